@@ -0,0 +1,256 @@
+# actor_learner.py
+import argparse
+import logging
+import time
+import numpy as np
+import torch
+import torch.multiprocessing as mp
+from vec_environment import VecGameEnv
+from agent import SimplifiedAgent
+from model import SimpleNet
+from quantization import QuantizedPolicy
+
+logger = logging.getLogger(__name__)
+
+
+def epsilon_ladder(n: int, base: float = 0.4, alpha: float = 7.0) -> np.ndarray:
+    """Ape-X драбина epsilon: eps_i = base^(1 + i / (n - 1) * alpha)"""
+    if n == 1:
+        return np.array([base])
+    return base ** (1 + np.arange(n) / (n - 1) * alpha)
+
+
+class SharedExperience:
+    """Кільця переходів у спільній пам'яті, по одному на актора.
+
+    Кожен актор - єдиний писач свого кільця: записує блок з n_envs переходів
+    (по одному з кожної дошки) і лише потім збільшує лічильник ``written``.
+    Якщо навчальний процес відстає більше ніж на ``slots`` переходів,
+    найстаріші непрочитані переходи відкидаються.
+    """
+
+    def __init__(self, n_actors: int, envs_per_actor: int, slots: int, state_shape):
+        # Кільце вміщує ціле число блоків
+        self.slots = max(1, slots // envs_per_actor) * envs_per_actor
+        self.envs_per_actor = envs_per_actor
+        self.states = torch.zeros((n_actors, self.slots, *state_shape)).share_memory_()
+        self.next_states = torch.zeros((n_actors, self.slots, *state_shape)).share_memory_()
+        self.actions = torch.zeros((n_actors, self.slots), dtype=torch.int64).share_memory_()
+        self.rewards = torch.zeros((n_actors, self.slots)).share_memory_()
+        self.dones = torch.zeros((n_actors, self.slots)).share_memory_()
+        self.written = torch.zeros(n_actors, dtype=torch.int64).share_memory_()
+        # Завершені епізоди та сума їхніх винагород
+        self.episodes = torch.zeros(n_actors, dtype=torch.int64).share_memory_()
+        self.episode_rewards = torch.zeros(n_actors, dtype=torch.float64).share_memory_()
+
+
+def _actor_loop(actor_id, env_config, epsilon, seed, experience, shared_net, version, lock, stop_event,
+                quantized=False):
+    torch.set_num_threads(1)
+    torch.manual_seed(seed)
+    rng = np.random.default_rng(seed)
+    n_envs = experience.envs_per_actor
+    env = VecGameEnv(n_envs=n_envs, seed=seed, obs_dtype=np.float32, **env_config)
+
+    net = SimpleNet(env.observation_space_shape, env.action_space_n)
+    policy = net
+    local_version = -1
+    states = experience.states[actor_id].numpy()
+    next_states = experience.next_states[actor_id].numpy()
+    actions_buf = experience.actions[actor_id].numpy()
+    rewards_buf = experience.rewards[actor_id].numpy()
+    dones_buf = experience.dones[actor_id].numpy()
+
+    state = env.reset()
+    episode_reward = np.zeros(n_envs)
+    while not stop_event.is_set():
+        # Підтягуємо нові ваги, якщо learner їх опублікував
+        if version.item() != local_version:
+            with lock:
+                net.load_state_dict(shared_net.state_dict())
+                local_version = version.item()
+            if quantized:
+                policy = QuantizedPolicy(net)
+
+        # epsilon-greedy: один прямий прохід лише по дошках, що не досліджують
+        explore = rng.random(n_envs) < epsilon
+        actions = rng.integers(0, env.action_space_n, n_envs)
+        greedy = np.flatnonzero(~explore)
+        if len(greedy):
+            with torch.inference_mode():
+                actions[greedy] = policy(torch.from_numpy(state[greedy])).argmax(1).numpy()
+
+        next_state, reward, done, _, info = env.step(actions)
+        terminal = next_state.copy()
+        if done.any():
+            terminal[info["final_index"]] = info["final_observation"]
+
+        start = experience.written[actor_id].item() % experience.slots
+        block = slice(start, start + n_envs)
+        states[block] = state
+        next_states[block] = terminal
+        actions_buf[block] = actions
+        rewards_buf[block] = reward
+        dones_buf[block] = done
+        experience.written[actor_id] += n_envs
+
+        episode_reward += reward
+        if done.any():
+            experience.episodes[actor_id] += int(done.sum())
+            experience.episode_rewards[actor_id] += float(episode_reward[done].sum())
+            episode_reward[done] = 0
+        state = next_state
+
+
+class ActorLearner:
+    """Навчання з кількома процесами-акторами та одним learner.
+
+    Актори (окремі процеси) крокують VecGameEnv з CPU-копією SimpleNet і
+    пишуть переходи у SharedExperience. Learner (поточний процес) переносить
+    їх у свою ReplayMemory, навчає SimplifiedAgent і кожні ``sync_every``
+    кроків навчання публікує ваги у спільну мережу.
+    """
+
+    def __init__(self, env_config: dict = None, n_actors: int = None, envs_per_actor: int = 8,
+                 buffer_slots: int = 4096, sync_every: int = 50, seed: int = 42,
+                 quantized_actors: bool = False, **agent_kwargs):
+        self.env_config = env_config or {}
+        self.n_actors = n_actors or max(1, mp.cpu_count() - 1)
+        self.sync_every = sync_every
+        self.seed = seed
+        # Актори діють int8-копією мережі, що перебудовується при кожній синхронізації
+        self.quantized_actors = quantized_actors
+
+        size = self.env_config.get('size', 6)
+        self.state_shape = (7, size, size)
+        self.agent = SimplifiedAgent(self.state_shape, 8, **agent_kwargs)
+        self.epsilons = epsilon_ladder(self.n_actors)
+
+        self._ctx = mp.get_context('spawn')
+        self.experience = SharedExperience(self.n_actors, envs_per_actor, buffer_slots, self.state_shape)
+        self.shared_net = SimpleNet(self.state_shape, 8)
+        self.shared_net.load_state_dict(self.agent.policy_net.state_dict())
+        self.shared_net.share_memory()
+        self.version = torch.zeros(1, dtype=torch.int64).share_memory_()
+        self._lock = self._ctx.Lock()
+        self._stop_event = self._ctx.Event()
+        self._processes = []
+        self._read = np.zeros(self.n_actors, dtype=np.int64)
+
+        self.train_steps = 0
+        self.dropped = 0
+        self.start_time = None
+
+    def start(self) -> None:
+        self.start_time = time.time()
+        for actor_id in range(self.n_actors):
+            process = self._ctx.Process(
+                target=_actor_loop,
+                args=(actor_id, self.env_config, float(self.epsilons[actor_id]), self.seed + actor_id,
+                      self.experience, self.shared_net, self.version, self._lock, self._stop_event,
+                      self.quantized_actors),
+                daemon=True
+            )
+            process.start()
+            self._processes.append(process)
+        logger.info(f"Started {self.n_actors} actors")
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        for process in self._processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        self._processes = []
+        self.agent.close()
+
+    def broadcast(self) -> None:
+        with self._lock:
+            self.shared_net.load_state_dict(self.agent.policy_net.state_dict())
+            self.version += 1
+
+    def drain(self) -> int:
+        """Переносить нові переходи акторів у replay-пам'ять learner"""
+        exp = self.experience
+        written = exp.written.numpy().copy()
+        total = 0
+        for actor_id in range(self.n_actors):
+            new = written[actor_id] - self._read[actor_id]
+            if new > exp.slots:
+                self.dropped += new - exp.slots
+                self._read[actor_id] = written[actor_id] - exp.slots
+                new = exp.slots
+            if new <= 0:
+                continue
+
+            positions = np.arange(self._read[actor_id], written[actor_id])
+            # Групуємо за дошкою, щоб ланцюжки станів у ReplayMemory не рвалися
+            positions = positions[np.argsort(positions % exp.envs_per_actor, kind='stable')] % exp.slots
+            states = exp.states[actor_id].numpy()[positions]
+            next_states = exp.next_states[actor_id].numpy()[positions]
+            actions = exp.actions[actor_id].numpy()[positions]
+            rewards = exp.rewards[actor_id].numpy()[positions]
+            dones = exp.dones[actor_id].numpy()[positions]
+            for k in range(len(positions)):
+                self.agent.remember(states[k], actions[k], rewards[k], next_states[k], dones[k])
+
+            self._read[actor_id] = written[actor_id]
+            total += new
+        return int(total)
+
+    def stats(self) -> dict:
+        elapsed = max(time.time() - (self.start_time or time.time()), 1e-9)
+        env_steps = int(self.experience.written.sum())
+        episodes = int(self.experience.episodes.sum())
+        return {
+            'env_steps': env_steps,
+            'env_steps_per_second': env_steps / elapsed,
+            'train_steps': self.train_steps,
+            'episodes': episodes,
+            'average_reward': float(self.experience.episode_rewards.sum()) / max(1, episodes),
+            'dropped': self.dropped,
+            'weights_version': int(self.version.item())
+        }
+
+    def run(self, train_steps: int, log_every: int = 1000) -> dict:
+        self.start()
+        try:
+            while self.train_steps < train_steps:
+                drained = self.drain()
+                loss = self.agent.train()
+                if loss is None:
+                    if not drained:
+                        time.sleep(0.001)
+                    continue
+
+                self.train_steps += 1
+                if self.train_steps % self.sync_every == 0:
+                    self.broadcast()
+                if self.train_steps % log_every == 0:
+                    logger.info(f"Learner step {self.train_steps}, loss {loss:.4f}, {self.stats()}")
+        finally:
+            self.stop()
+        return self.stats()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Actor-learner training")
+    parser.add_argument('--actors', type=int, default=None)
+    parser.add_argument('--envs-per-actor', type=int, default=8)
+    parser.add_argument('--train-steps', type=int, default=10000)
+    parser.add_argument('--sync-every', type=int, default=50)
+    parser.add_argument('--size', type=int, default=6)
+    parser.add_argument('--coins', type=int, default=1)
+    parser.add_argument('--obstacles', type=int, default=2)
+    parser.add_argument('--quantized-actors', action='store_true')
+    args = parser.parse_args()
+
+    learner = ActorLearner(
+        env_config={'size': args.size, 'n_coins': args.coins, 'n_obstacles': args.obstacles},
+        n_actors=args.actors,
+        envs_per_actor=args.envs_per_actor,
+        sync_every=args.sync_every,
+        quantized_actors=args.quantized_actors
+    )
+    print(learner.run(args.train_steps))
@@ -3,15 +3,32 @@ import torch.nn as nn
 import torch.nn.functional as F
 import torch.optim as optim
 import numpy as np
-from collections import deque
 import random
-from torch.cuda.amp import autocast, GradScaler
-from model import SimpleNet
+import time
+from model import SimpleNet, compile_module
 from utils import DEVICE, Experience
+from environment import UINT8_SCALE, UINT8_OFFSET
+from replay import ReplayMemory, ReplayBuffer, MemmapReplayMemory
+from prefetch import PrefetchSampler
+from quantization import QuantizedPolicy
+from metrics import Metrics
+
+
+def _cpu_copy(value):
+    # Тензори копіюються на CPU, контейнери - рекурсивно
+    if torch.is_tensor(value):
+        return value.detach().to('cpu', copy=True)
+    if isinstance(value, dict):
+        return {key: _cpu_copy(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return type(value)(_cpu_copy(item) for item in value)
+    return value
 
 
 class SimplifiedAgent:
-    def __init__(self, state_shape, n_actions, learning_rate=1e-3):
+    def __init__(self, state_shape, n_actions, learning_rate=1e-3,
+                 memory_size=10000, obs_dtype=None, prioritized=False, prefetch=0,
+                 compiled=False, quantized=False, memory_dir=None):
         self.state_shape = state_shape  # Повинно бути (7, size, size)
         self.n_actions = n_actions
 
@@ -29,49 +46,237 @@ class SimplifiedAgent:
         self.target_net.load_state_dict(self.policy_net.state_dict())
 
         self.optimizer = optim.Adam(self.policy_net.parameters(), lr=learning_rate)
-        self.memory = deque(maxlen=10000)
+        # Компактна кільцева пам'ять: одна float32/uint8 копія кожного спостереження
+        if memory_dir is not None:
+            # Пам'ять на диску (np.memmap), що переживає перезапуск
+            if prioritized:
+                raise ValueError("Prioritized replay is not supported with memory_dir")
+            self.memory = MemmapReplayMemory(memory_size, memory_dir, obs_dtype=obs_dtype)
+        elif prioritized:
+            self.memory = ReplayBuffer(memory_size, obs_dtype=obs_dtype)
+        else:
+            self.memory = ReplayMemory(memory_size, obs_dtype=obs_dtype)
+
+        # Шляхи виконання мережі; compile() замінює їх прискореними
+        self.memory_format = None
+        self._train_net = self.policy_net
+        self._act_net = self.policy_net
+        self._target_eval_net = self.target_net
+
+        # prefetch > 0: стільки батчів готує фоновий PrefetchSampler
+        self.prefetch = prefetch
+        self.sampler = None
+
+        # Деквантування uint8-спостережень виконується вже на пристрої
+        self._obs_scale = torch.from_numpy(UINT8_SCALE).view(-1, 1, 1).to(DEVICE)
+        self._obs_offset = torch.from_numpy(UINT8_OFFSET).view(-1, 1, 1).to(DEVICE)
+
+        # int8-копія для дій; None - дії обчислює fp32 мережа
+        self.quantized_policy = None
+        self.quantize_every = 0
+        self.train_steps = 0
+
+        # Час фаз навчання та дій (get_action, sample, forward, backward, ...)
+        self.metrics = Metrics()
+
+        if compiled:
+            self.compile()
+        if quantized:
+            self.quantize()
+
+    def compile(self, channels_last=True):
+        """Прискорений режим виконання SimpleNet.
+
+        Ваги переводяться у channels_last, а навчальний, діючий (inference
+        mode) та target шляхи компілюються окремо через torch.compile або
+        TorchScript. Одноразовий прогрів переносить затримку компіляції з
+        першого епізоду сюди.
+        """
+        if channels_last:
+            self.memory_format = torch.channels_last
+            self.policy_net.to(memory_format=torch.channels_last)
+            self.target_net.to(memory_format=torch.channels_last)
+
+        example = self._format(torch.zeros((self.batch_size, *self.state_shape), device=DEVICE))
+        self._train_net = compile_module(self.policy_net, example)
+        with torch.inference_mode():
+            self._act_net = compile_module(self.policy_net, example[:1])
+        with torch.no_grad():
+            self._target_eval_net = compile_module(self.target_net, example)
+
+        # Прогрів: різні розміри батча для дій та прохід назад для навчання
+        with torch.inference_mode():
+            self._act_net(example)
+        self._train_net(example).sum().backward()
+        self.optimizer.zero_grad()
+
+    def quantize(self, refresh_every=500, static_convs=False):
+        """Дії обчислює int8 QuantizedPolicy замість fp32 мережі.
+
+        Кожні ``refresh_every`` кроків навчання копія перебудовується з
+        поточних ваг, а ``quantized_policy.agreement`` зберігає частку станів
+        батча, на яких її argmax збігається з fp32.
+        """
+        self.quantize_every = refresh_every
+        self.quantized_policy = QuantizedPolicy(self.policy_net, static_convs=static_convs)
+
+    def _refresh_quantized(self, states):
+        # Поточний батч слугує і калібруванням статичних згорток, і перевіркою
+        self.quantized_policy.refresh(self.policy_net, calibration=states.cpu())
+        with torch.inference_mode():
+            self.quantized_policy.measure_agreement(self._act_net, self._format(states))
+
+    def _act(self, states):
+        if self.quantized_policy is not None:
+            return self.quantized_policy(states)
+        return self._act_net(self._format(states))
+
+    def _format(self, states):
+        if self.memory_format is None:
+            return states
+        return states.contiguous(memory_format=self.memory_format)
+
+    def _to_tensor(self, states):
+        # float32 на CPU передається без копіювання, float64 - з однією конвертацією
+        states = torch.as_tensor(states, device=DEVICE)
+        if states.dtype == torch.uint8:
+            channels = states.shape[-3]
+            return states.float() * self._obs_scale[:channels] + self._obs_offset[:channels]
+        return states.float()
 
     def remember(self, state, action, reward, next_state, done):
-        self.memory.append((state, action, reward, next_state, done))
+        self.memory.push(state, action, reward, next_state, done)
 
     def get_action(self, state):
+        start = time.perf_counter_ns()
         if random.random() < self.epsilon:
-            return random.randrange(self.n_actions)
+            action = random.randrange(self.n_actions)
+        else:
+            with torch.inference_mode():
+                q_values = self._act(self._to_tensor(state).unsqueeze(0))
+                action = q_values.argmax(1).item()
+        self.metrics.record('get_action', start)
+        return action
 
-        with torch.no_grad():
-            state = torch.FloatTensor(state).unsqueeze(0).to(DEVICE)
-            q_values = self.policy_net(state)
-            return q_values.argmax(1).item()
+    def get_actions(self, states, epsilon=None):
+        """epsilon-greedy дії для батча станів (B, C, H, W).
+
+        epsilon - скаляр або масив довжини B (наприклад, Ape-X драбина);
+        за замовчуванням self.epsilon. Прямий прохід виконується один раз і
+        лише для рядків, що не досліджують.
+        """
+        n = len(states)
+        epsilon = self.epsilon if epsilon is None else np.asarray(epsilon)
+        explore = np.random.random_sample(n) < epsilon
+        actions = np.random.randint(0, self.n_actions, size=n)
+
+        greedy = np.flatnonzero(~explore)
+        if len(greedy):
+            with torch.inference_mode():
+                q_values = self._act(self._to_tensor(states[greedy]))
+                actions[greedy] = q_values.argmax(1).cpu().numpy()
+        return actions
 
     def train(self):
         if len(self.memory) < self.batch_size:
             return None
 
-        batch = random.sample(self.memory, self.batch_size)
-        states, actions, rewards, next_states, dones = zip(*batch)
+        start = time.perf_counter_ns()
+        if self.prefetch:
+            if self.sampler is None:
+                self.sampler = PrefetchSampler(self.memory, self.batch_size, depth=self.prefetch)
+            batch = self.sampler.get()
+        else:
+            batch = self.memory.sample(self.batch_size)
+        self.metrics.record('sample', start)
+        return self.train_on_batch(*batch)
 
-        states = torch.FloatTensor(np.array(states)).to(DEVICE)
-        actions = torch.LongTensor(actions).to(DEVICE)
-        rewards = torch.FloatTensor(rewards).to(DEVICE)
-        next_states = torch.FloatTensor(np.array(next_states)).to(DEVICE)
-        dones = torch.FloatTensor(dones).to(DEVICE)
+    def train_on_batch(self, states, actions, rewards, next_states, dones,
+                       indices=None, weights=None):
+        metrics = self.metrics
+        start = time.perf_counter_ns()
+        states = self._to_tensor(states)
+        actions = torch.as_tensor(actions, device=DEVICE)
+        rewards = torch.as_tensor(rewards, device=DEVICE)
+        next_states = self._to_tensor(next_states)
+        dones = torch.as_tensor(dones, device=DEVICE)
+        prioritized = weights is not None
 
-        current_q_values = self.policy_net(states).gather(1, actions.unsqueeze(1))
-        next_q_values = self.target_net(next_states).max(1)[0].detach()
+        current_q_values = self._train_net(self._format(states)).gather(1, actions.unsqueeze(1))
+        with torch.no_grad():
+            next_q_values = self._target_eval_net(self._format(next_states)).max(1)[0]
         expected_q_values = rewards + (1 - dones) * self.gamma * next_q_values
+        start = metrics.record('forward', start)
 
-        loss = F.smooth_l1_loss(current_q_values.squeeze(), expected_q_values)
+        if prioritized:
+            # Ваги importance sampling компенсують зміщення пріоритетної вибірки
+            weights = torch.as_tensor(weights, device=DEVICE)
+            elementwise = F.smooth_l1_loss(current_q_values.squeeze(1), expected_q_values,
+                                           reduction='none')
+            loss = (weights * elementwise).mean()
+            td_errors = (expected_q_values - current_q_values.squeeze(1)).detach()
+            self.memory.update_priorities(indices, td_errors.abs().cpu().numpy())
+            start = metrics.record('priority_update', start)
+        else:
+            loss = F.smooth_l1_loss(current_q_values.squeeze(), expected_q_values)
 
         self.optimizer.zero_grad()
         loss.backward()
+        start = metrics.record('backward', start)
         torch.nn.utils.clip_grad_norm_(self.policy_net.parameters(), 1.0)
         self.optimizer.step()
+        loss = loss.item()
+        start = metrics.record('optimizer', start)
 
         # Оновлюємо target network кожні 10 батчів
         if random.random() < 0.1:
             self.target_net.load_state_dict(self.policy_net.state_dict())
+            start = metrics.record('target_sync', start)
+
+        self.train_steps += 1
+        if self.quantized_policy is not None and self.train_steps % self.quantize_every == 0:
+            self._refresh_quantized(states)
+            metrics.record('quantize_refresh', start)
+
+        return loss
+
+    def state_dict(self, include_memory=False):
+        """Знімок стану тренування на CPU, незалежний від подальших кроків"""
+        state = {
+            'policy_net': _cpu_copy(self.policy_net.state_dict()),
+            'target_net': _cpu_copy(self.target_net.state_dict()),
+            'optimizer': _cpu_copy(self.optimizer.state_dict()),
+            'epsilon': self.epsilon,
+            'train_steps': self.train_steps
+        }
+        if include_memory:
+            state['memory'] = self.memory.state_dict()
+        return state
 
-        return loss.item()
+    def load_state_dict(self, state):
+        self.policy_net.load_state_dict(state['policy_net'])
+        self.target_net.load_state_dict(state['target_net'])
+        # Adam сам переносить свій стан на пристрій параметрів
+        self.optimizer.load_state_dict(state['optimizer'])
+        self.epsilon = state['epsilon']
+        self.train_steps = state['train_steps']
+        if 'memory' in state:
+            # Передвибрані батчі належать старому вмісту пам'яті
+            self.close()
+            self.memory.load_state_dict(state['memory'])
+        if self.quantized_policy is not None:
+            self.quantized_policy.refresh(self.policy_net)
+
+    def close(self):
+        if self.sampler is not None:
+            self.sampler.close()
+            self.sampler = None
+        if isinstance(self.memory, MemmapReplayMemory):
+            self.memory.close()
 
     def update_epsilon(self):
-        self.epsilon = max(self.epsilon_min, self.epsilon * self.epsilon_decay)
\ No newline at end of file
+        self.epsilon = max(self.epsilon_min, self.epsilon * self.epsilon_decay)
+
+
+# Сумісність з модулями, що очікують стару назву класу
+Agent = SimplifiedAgent
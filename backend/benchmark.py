@@ -0,0 +1,227 @@
+# benchmark.py
+"""Відтворювані бенчмарки середовищ, агента та циклу тренування (лише CPU).
+
+    python benchmark.py --output baseline.json
+    python benchmark.py --compare baseline.json [--tolerance 0.15]
+
+Усі результати - швидкості (більше - краще). У режимі --compare
+регресією вважається падіння нижче baseline * (1 - tolerance); тоді
+скрипт завершується з кодом 1.
+"""
+import os
+
+# Лише CPU: вимикаємо CUDA до першого імпорту torch
+os.environ.setdefault("CUDA_VISIBLE_DEVICES", "")
+
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import numpy as np
+from environment import SimplifiedGameEnv
+from bitboard_environment import BitboardGameEnv
+from vec_environment import VecGameEnv
+from optimized_environment import MultiCoinGameEnv
+
+SEED = 42
+
+
+def seed_everything(seed: int = SEED) -> None:
+    random.seed(seed)
+    np.random.seed(seed)
+    if 'torch' in sys.modules:
+        sys.modules['torch'].manual_seed(seed)
+
+
+def measure(fn, n: int, repeat: int) -> float:
+    """Найкраща з ``repeat`` спроб швидкість (викликів fn за секунду)"""
+    best = float('inf')
+    for _ in range(repeat):
+        seed_everything()
+        start = time.perf_counter()
+        fn(n)
+        best = min(best, time.perf_counter() - start)
+    return n / best
+
+
+def _stepper(env, n_actions: int = 8):
+    actions = np.random.default_rng(SEED).integers(0, n_actions, 1 << 16)
+
+    def run(n):
+        env.reset()
+        for k in range(n):
+            done = env.step(int(actions[k & 0xFFFF]))[2]
+            if done:
+                env.reset()
+    return run
+
+
+def bench_env(scale: int, repeat: int) -> dict:
+    results = {}
+    for size in (6, 12, 20):
+        for name, cls, kwargs in (('list', SimplifiedGameEnv, {}),
+                                  ('incremental', SimplifiedGameEnv, {'incremental': True}),
+                                  ('bitboard', BitboardGameEnv, {})):
+            if name == 'bitboard' and size > 8:
+                continue
+            seed_everything()
+            env = cls(size=size, n_coins=3, n_obstacles=size // 2, **kwargs)
+            results[f'env_step/{name}/size{size}'] = measure(_stepper(env), 500 * scale, repeat)
+
+        seed_everything()
+        env = SimplifiedGameEnv(size=size, n_coins=3, n_obstacles=size // 2)
+        results[f'env_reset/size{size}'] = measure(lambda n: [env.reset() for _ in range(n)],
+                                                   100 * scale, repeat)
+
+    seed_everything()
+    env = MultiCoinGameEnv(size=8, n_coins=3, n_obstacles=4)
+    results['multicoin_step/size8'] = measure(_stepper(env), 300 * scale, repeat)
+
+    vec = VecGameEnv(n_envs=64, size=8, n_coins=3, n_obstacles=4, seed=SEED)
+    actions = np.random.default_rng(SEED).integers(0, 8, (64, 64))
+    # Швидкість у кроках окремих дошок за секунду
+    results['vec_env_step/64x8'] = 64 * measure(
+        lambda n: [vec.step(actions[k % 64]) for k in range(n)], 50 * scale, repeat)
+    return results
+
+
+def bench_update_grid(scale: int, repeat: int) -> dict:
+    results = {}
+    for size in (6, 12, 20, 30):
+        for n_coins in (1, 5, 20):
+            seed_everything()
+            env = SimplifiedGameEnv(size=size, n_coins=n_coins, n_obstacles=2)
+            env.reset()
+            results[f'update_grid/size{size}/coins{n_coins}'] = measure(
+                lambda n: [env.update_grid() for _ in range(n)], 20 * scale, repeat)
+    return results
+
+
+def bench_agent(scale: int, repeat: int) -> dict:
+    import torch
+    from agent import SimplifiedAgent
+
+    torch.set_num_threads(1)
+    results = {}
+    for size in (6, 12):
+        seed_everything()
+        env = SimplifiedGameEnv(size=size, obs_dtype=np.float32)
+        agent = SimplifiedAgent((7, size, size), 8)
+        agent.epsilon = 0.0
+        state = env.reset()
+        results[f'agent_get_action/size{size}'] = measure(
+            lambda n: [agent.get_action(state) for _ in range(n)], 100 * scale, repeat)
+
+        for batch_size in (32, 128, 256):
+            seed_everything()
+            agent = SimplifiedAgent((7, size, size), 8, memory_size=2048)
+            agent.batch_size = batch_size
+            state = env.reset()
+            for k in range(1024):
+                action = k % 8
+                next_state, reward, done, _, _ = env.step(action)
+                agent.remember(state, action, reward, next_state, done)
+                state = env.reset() if done else next_state
+            results[f'agent_train/size{size}/batch{batch_size}'] = measure(
+                lambda n: [agent.train() for _ in range(n)], max(2, 5 * scale // (batch_size // 32)), repeat)
+            agent.close()
+    return results
+
+
+def bench_training(scale: int, repeat: int) -> dict:
+    import torch
+    from training import run_training
+
+    torch.set_num_threads(1)
+    config = {
+        'envConfig': {'size': 6, 'nCoins': 1, 'nObstacles': 2},
+        'agentConfig': {'learningRate': 1e-3},
+        'trainingConfig': {'episodes': 0, 'renderEvery': 10},
+        'renderSteps': False
+    }
+
+    def run(n):
+        config['trainingConfig']['episodes'] = n
+        run_training(config, lambda message: None, lambda: False)
+
+    # Епізоди тренування за секунду, без сокетів
+    return {'training_episodes/size6': measure(run, 2 * scale, repeat)}
+
+
+SUITES = {
+    'env': bench_env,
+    'update_grid': bench_update_grid,
+    'agent': bench_agent,
+    'training': bench_training,
+}
+
+
+def environment_info() -> dict:
+    info = {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count(),
+        'seed': SEED,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S')
+    }
+    if 'torch' in sys.modules:
+        info['torch'] = sys.modules['torch'].__version__
+    return info
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """Рядки порівняння; регресії позначені REGRESSION"""
+    rows = []
+    for name, value in results.items():
+        base = baseline.get(name)
+        if base is None:
+            rows.append((name, value, None, None, 'new'))
+            continue
+        ratio = value / base
+        status = 'REGRESSION' if ratio < 1 - tolerance else ('faster' if ratio > 1 + tolerance else 'ok')
+        rows.append((name, value, base, ratio, status))
+    return rows
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Reproducible CPU benchmarks")
+    parser.add_argument('--suite', action='append', choices=sorted(SUITES),
+                        help="набори для запуску (за замовчуванням - усі)")
+    parser.add_argument('--scale', type=int, default=10, help="множник кількості ітерацій")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', help="файл для JSON з результатами")
+    parser.add_argument('--compare', help="JSON baseline для порівняння")
+    parser.add_argument('--tolerance', type=float, default=0.15)
+    args = parser.parse_args()
+
+    results = {}
+    for suite in args.suite or SUITES:
+        start = time.perf_counter()
+        results.update(SUITES[suite](args.scale, args.repeat))
+        print(f"{suite}: {time.perf_counter() - start:.1f}s", file=sys.stderr)
+
+    report = {'environment': environment_info(), 'results': results}
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if not args.compare:
+        print(json.dumps(report, indent=2))
+        return 0
+
+    with open(args.compare) as f:
+        baseline = json.load(f)['results']
+    rows = compare(results, baseline, args.tolerance)
+    for name, value, base, ratio, status in rows:
+        base_text = f"{base:12.1f}" if base is not None else f"{'-':>12}"
+        ratio_text = f"{ratio:6.2f}x" if ratio is not None else f"{'-':>7}"
+        print(f"{status:<10} {name:<40} {value:12.1f} {base_text} {ratio_text}")
+    return 1 if any(row[4] == 'REGRESSION' for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
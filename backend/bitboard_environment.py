@@ -0,0 +1,243 @@
+# bitboard_environment.py
+import numpy as np
+import random
+from typing import List, Tuple, Dict
+from environment import SimplifiedGameEnv, coin_distance_map
+
+MOVES = [(-1, 0), (-1, 1), (0, 1), (1, 1),
+         (1, 0), (1, -1), (0, -1), (-1, -1)]
+OBSTACLE_MOVES = [(0, 1), (1, 0), (0, -1), (-1, 0)]
+
+
+class BitboardGameEnv(SimplifiedGameEnv):
+    """SimplifiedGameEnv для дошок до 8x8 на бітових масках.
+
+    Агент, монети та перешкоди зберігаються як 64-бітні маски (один біт на
+    клітинку, індекс i * size + j), тож колізії, збір монет, розміщення та
+    рух перешкод зводяться до бітових операцій. Площини спостереження
+    розпаковуються з масок лише при зверненні до ``grid``/``get_state``.
+    Порядок монет і перешкод зберігається окремо, щоб споживання ``random``
+    і вибір найближчої монети збігалися зі списковим рушієм.
+    """
+
+    def __init__(self, size: int = 6, n_coins: int = 1, n_obstacles: int = 2,
+                 dynamic_obstacles: bool = False, rewards: dict = None, **kwargs):
+        if size * size > 64:
+            raise ValueError(f"Bitboard engine supports boards up to 8x8, got {size}x{size}")
+        self._n_cells = size * size
+        # Для кожної клітинки - допустимі ходи перешкоди у порядку OBSTACLE_MOVES
+        self._obstacle_targets = []
+        for cell in range(self._n_cells):
+            i, j = divmod(cell, size)
+            self._obstacle_targets.append([
+                (i + dx) * size + (j + dy) for dx, dy in OBSTACLE_MOVES
+                if 0 <= i + dx < size and 0 <= j + dy < size
+            ])
+        self._agent = 0
+        self._coin_mask = 0
+        self._obstacle_mask = 0
+        self._coin_cells = []
+        self._obstacle_cells = []
+        self._distance_key = None
+        self._direction_key = None
+        self._grid_dirty = True
+        super().__init__(size, n_coins, n_obstacles, dynamic_obstacles, rewards, **kwargs)
+
+    # Сумісні зі списковим рушієм подання позицій
+    @property
+    def agent_pos(self) -> List[int]:
+        return list(divmod(self._agent, self.size))
+
+    @agent_pos.setter
+    def agent_pos(self, pos) -> None:
+        self._agent = int(pos[0]) * self.size + int(pos[1])
+        self._grid_dirty = True
+
+    @property
+    def coins(self) -> List[List[int]]:
+        return [list(divmod(cell, self.size)) for cell in self._coin_cells]
+
+    @coins.setter
+    def coins(self, positions) -> None:
+        self._coin_cells = [int(i) * self.size + int(j) for i, j in positions]
+        self._coin_mask = self._to_mask(self._coin_cells)
+        self._grid_dirty = True
+
+    @property
+    def obstacles(self) -> List[List[int]]:
+        return [list(divmod(cell, self.size)) for cell in self._obstacle_cells]
+
+    @obstacles.setter
+    def obstacles(self, positions) -> None:
+        self._obstacle_cells = [int(i) * self.size + int(j) for i, j in positions]
+        self._obstacle_mask = self._to_mask(self._obstacle_cells)
+        self._grid_dirty = True
+
+    @property
+    def grid(self) -> np.ndarray:
+        if self._grid_dirty:
+            self._unpack_grid()
+        return self._grid
+
+    @grid.setter
+    def grid(self, value: np.ndarray) -> None:
+        self._grid = value
+        self._distance_key = None
+        self._direction_key = None
+        self._grid_dirty = True
+
+    @staticmethod
+    def _to_mask(cells: List[int]) -> int:
+        mask = 0
+        for cell in cells:
+            mask |= 1 << cell
+        return mask
+
+    def reset(self):
+        self.steps = 0
+        self.score = 0
+
+        # Розміщення агента в центрі
+        center = self.size // 2
+        self._agent = center * self.size + center
+
+        # Розміщення монет та перешкод
+        self._coin_mask = 0
+        self._obstacle_mask = 0
+        self._coin_cells = self._place_cells(self.n_coins)
+        self._coin_mask = self._to_mask(self._coin_cells)
+        self._obstacle_cells = self._place_cells(self.n_obstacles)
+        self._obstacle_mask = self._to_mask(self._obstacle_cells)
+
+        self._grid_dirty = True
+        return self.get_state()
+
+    def _place_cells(self, count: int) -> List[int]:
+        # Вільні клітинки у тому ж порядку (рядок за рядком), що й у
+        # _place_objects, тож random.sample обирає ті самі позиції
+        occupied = (1 << self._agent) | self._coin_mask | self._obstacle_mask
+        free = ~occupied & ((1 << self._n_cells) - 1)
+        available_positions = []
+        while free:
+            low = free & -free
+            available_positions.append(low.bit_length() - 1)
+            free ^= low
+
+        n_positions = min(count, len(available_positions))
+        if n_positions > 0:
+            return random.sample(available_positions, n_positions)
+        return []
+
+    def update_grid(self) -> None:
+        self._grid_dirty = True
+        self._unpack_grid()
+
+    def _unpack(self, mask: int) -> np.ndarray:
+        bits = np.unpackbits(np.frombuffer(mask.to_bytes(8, 'little'), dtype=np.uint8),
+                             bitorder='little')
+        return bits[:self._n_cells].reshape(self.size, self.size)
+
+    def _unpack_grid(self) -> None:
+        grid = self._grid
+        size = self.size
+
+        # Базові канали
+        grid[0].fill(0)
+        grid[0].flat[self._agent] = 1
+        grid[1] = self._unpack(self._coin_mask)
+        grid[2] = self._unpack(self._obstacle_mask)
+
+        # Distance map перераховується лише при зміні маски монет
+        if self._distance_key != self._coin_mask:
+            if self._coin_cells:
+                ci, cj = np.divmod(np.array(self._coin_cells), size)
+                min_dist = coin_distance_map(size, ci, cj)
+                grid[3] = self._encode(3, 1 - min_dist / (2 * size))
+            else:
+                grid[3].fill(0)
+            self._distance_key = self._coin_mask
+
+        # Вільний простір
+        grid[4] = 1 - (grid[0] + grid[1] + grid[2])
+
+        # Напрямок до найближчої монети
+        if self._direction_key != (self._agent, self._coin_mask):
+            if self._coin_cells:
+                ai, aj = divmod(self._agent, size)
+                closest_coin = min(self._coin_cells,
+                                   key=lambda c: abs(c // size - ai) + abs(c % size - aj))
+                dx = closest_coin // size - ai
+                dy = closest_coin % size - aj
+                dist = max(abs(dx), abs(dy), 1)
+                grid[5].fill(self._encode(5, dx / dist))
+                grid[6].fill(self._encode(6, dy / dist))
+            else:
+                grid[5].fill(self._encode(5, 0))
+                grid[6].fill(self._encode(6, 0))
+            self._direction_key = (self._agent, self._coin_mask)
+
+        self._grid_dirty = False
+
+    def step(self, action: int) -> Tuple[np.ndarray, float, bool, bool, Dict]:
+        self.steps += 1
+        size = self.size
+
+        # Рух агента
+        i, j = divmod(self._agent, size)
+        dx, dy = MOVES[action]
+        new_cell = min(max(i + dx, 0), size - 1) * size + min(max(j + dy, 0), size - 1)
+        new_bit = 1 << new_cell
+
+        # Перевірка колізій та винагород
+        if self._obstacle_mask & new_bit:
+            reward = self.rewards['collision']
+            done = False
+        else:
+            self._agent = new_cell
+            reward = self.rewards['step']
+            done = False
+
+            # Збір монет
+            if self._coin_mask & new_bit:
+                self._coin_mask ^= new_bit
+                self._coin_cells.remove(new_cell)
+                reward = self.rewards['coinCollected']
+                self.score += 1
+                if not self._coin_mask:
+                    reward += self.rewards['completion']
+                    done = True
+
+            # Перевірка ліміту кроків
+            if self.steps >= self.max_steps:
+                reward += self.rewards['timeout']
+                done = True
+
+        # Динамічні перешкоди
+        if self.dynamic_obstacles and not done and random.random() < 0.1:
+            self._update_dynamic_obstacles()
+
+        self._grid_dirty = True
+        info = {
+            "score": self.score,
+            "steps": self.steps,
+            "coins_left": bin(self._coin_mask).count("1")
+        }
+
+        return self.get_state(), reward, done, False, info
+
+    def _update_dynamic_obstacles(self) -> List[Tuple[List[int], List[int]]]:
+        # Рухаємо кожну перешкоду з певною ймовірністю
+        moved = []
+        for idx, cell in enumerate(self._obstacle_cells):
+            if random.random() < 0.3:  # 30% шанс руху
+                targets = self._obstacle_targets[cell]
+                if targets:
+                    new_cell = random.choice(targets)
+                    new_bit = 1 << new_cell
+                    # Перевіряємо, чи нова позиція не зайнята
+                    if not (((1 << self._agent) | self._coin_mask | self._obstacle_mask) & new_bit):
+                        self._obstacle_mask ^= (1 << cell) | new_bit
+                        self._obstacle_cells[idx] = new_cell
+                        moved.append((list(divmod(cell, self.size)),
+                                      list(divmod(new_cell, self.size))))
+        return moved
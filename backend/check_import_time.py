@@ -0,0 +1,32 @@
+# check_import_time.py
+"""Звіт про час холодного імпорту точок входу backend.
+
+Тонка CLI-обгортка над test_import_time (бюджети та вимірювання - там,
+у CI їх перевіряє pytest).
+
+    python check_import_time.py [--repeat 3] [--scale 1.0]
+"""
+import argparse
+import sys
+from test_import_time import BUDGETS, check
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Import-time budget check")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--scale', type=float, default=1.0,
+                        help="множник бюджетів для повільних машин")
+    args = parser.parse_args()
+
+    failed = False
+    for module in BUDGETS:
+        best, limit, heavy = check(module, args.repeat, args.scale)
+        ok = best <= limit and not heavy
+        failed |= not ok
+        note = f" (loads {', '.join(heavy)})" if heavy else ""
+        print(f"{'ok  ' if ok else 'FAIL'} {module:<24} {best:8.1f} ms / {limit:.0f} ms{note}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,247 @@
+# checkpoint.py
+import json
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+from typing import Optional
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+INDEX_NAME = 'index.json'
+
+# torch імпортується лише у функціях запису/читання: пошук чекпойнтів
+# (latest_checkpoint) потрібен серверу, який стартує без torch
+
+
+def capture_rng() -> dict:
+    import torch
+    state = {
+        'python': random.getstate(),
+        'numpy': np.random.get_state(),
+        'torch': torch.get_rng_state()
+    }
+    if torch.cuda.is_available():
+        state['cuda'] = torch.cuda.get_rng_state_all()
+    return state
+
+
+def restore_rng(state: dict) -> None:
+    import torch
+    random.setstate(state['python'])
+    np.random.set_state(state['numpy'])
+    torch.set_rng_state(state['torch'])
+    if 'cuda' in state and torch.cuda.is_available():
+        torch.cuda.set_rng_state_all(state['cuda'])
+
+
+def _replace_atomically(path: str, write) -> None:
+    # Тимчасовий файл у тій самій директорії: os.replace тоді атомарний
+    tmp = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
+    try:
+        with open(tmp, 'wb') as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def atomic_save(obj, path: str) -> None:
+    import torch
+    _replace_atomically(path, lambda f: torch.save(obj, f))
+
+
+def read_index(directory: str) -> list:
+    path = os.path.join(directory, INDEX_NAME)
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return json.load(f)
+
+
+def latest_checkpoint(directory: str) -> Optional[str]:
+    """Шлях до останнього завершеного чекпойнта або None"""
+    index = read_index(directory) if os.path.isdir(directory) else []
+    if not index:
+        return None
+    return os.path.join(directory, max(index, key=lambda entry: entry['step'])['file'])
+
+
+def _safe_globals() -> list:
+    # Окрім тензорів чекпойнт містить numpy-масиви (replay memory, стан
+    # генератора numpy): дозволяються лише їхні конструктори, а не довільний unpickle
+    reconstruct = np.empty(0).__reduce__()[0]
+    dtypes = [type(np.dtype(t)) for t in (np.bool_, np.uint8, np.uint32, np.int32, np.int64,
+                                          np.float16, np.float32, np.float64)]
+    return [reconstruct, np.ndarray, np.dtype, *dtypes]
+
+
+def load_checkpoint(path: str, agent, rng: bool = True) -> dict:
+    """Відновлює агента (і генератори випадкових чисел) з чекпойнта.
+
+    Повертає {'step', 'score', 'extra'} - стан циклу тренування, який
+    зберіг викликач.
+    """
+    import torch
+    with torch.serialization.safe_globals(_safe_globals()):
+        checkpoint = torch.load(path, map_location='cpu', weights_only=True)
+    agent.load_state_dict(checkpoint['agent'])
+    if rng:
+        restore_rng(checkpoint['rng'])
+    return {key: checkpoint[key] for key in ('step', 'score', 'extra')}
+
+
+def _to_builtin(obj):
+    # Скаляри numpy (np.float64 з np.mean тощо) не проходять weights_only-завантаження
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, dict):
+        return {key: _to_builtin(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return type(obj)(_to_builtin(value) for value in obj)
+    return obj
+
+
+class CheckpointManager:
+    """Асинхронні чекпойнти тренування з політикою зберігання.
+
+    ``save`` знімає стан агента (ваги обох мереж, оптимізатор, epsilon,
+    лічильник кроків, за ``include_memory`` - і replay memory) та генераторів
+    випадкових чисел одразу, у потоці тренування, а серіалізація і запис на
+    диск відбуваються у фоновому потоці: у тимчасовий файл, fsync і
+    os.replace, тож на диску завжди лише цілі чекпойнти. Після запису
+    зберігаються ``keep_last`` останніх і ``keep_best`` найкращих за score,
+    решта видаляються. Перелік чекпойнтів - у index.json тієї ж директорії.
+
+    Якщо задано ``best_weights``, ваги policy_net найкращого чекпойнта
+    також пишуться туди (формат state_dict, як раніше best_model.pth).
+    Поки в черзі ``max_pending`` незаписаних знімків, ``save`` чекає.
+    """
+
+    def __init__(self, directory: str, keep_last: int = 3, keep_best: int = 1,
+                 include_memory: bool = False, best_weights: Optional[str] = None,
+                 max_pending: int = 2):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.keep_last = keep_last
+        self.keep_best = keep_best
+        self.include_memory = include_memory
+        self.best_weights = best_weights
+        self.max_pending = max_pending
+        self.index = read_index(directory)
+        self.error = None
+        self.saved = 0
+
+        self._pending = deque()
+        self._writing = False
+        self._closed = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._worker, name='checkpoint-writer', daemon=True)
+        self._thread.start()
+
+    @property
+    def best_score(self) -> float:
+        scores = [entry['score'] for entry in self.index if entry['score'] is not None]
+        return max(scores, default=float('-inf'))
+
+    def latest(self) -> Optional[str]:
+        with self._cond:
+            if not self.index:
+                return None
+            return os.path.join(self.directory, max(self.index, key=lambda e: e['step'])['file'])
+
+    def save(self, agent, step: int, score: Optional[float] = None, extra: Optional[dict] = None) -> None:
+        checkpoint = {
+            'step': step,
+            'score': None if score is None else float(score),
+            'time': time.time(),
+            'agent': agent.state_dict(include_memory=self.include_memory),
+            'rng': capture_rng(),
+            'extra': _to_builtin(extra or {})
+        }
+        with self._cond:
+            self._check_error()
+            while len(self._pending) >= self.max_pending and self.error is None:
+                self._cond.wait()
+            self._check_error()
+            self._pending.append(checkpoint)
+            self._cond.notify_all()
+
+    def wait(self) -> None:
+        """Чекає, доки всі поставлені знімки запишуться"""
+        with self._cond:
+            while (self._pending or self._writing) and self.error is None:
+                self._cond.wait()
+            self._check_error()
+
+    def close(self) -> None:
+        try:
+            self.wait()
+        finally:
+            with self._cond:
+                self._closed = True
+                self._cond.notify_all()
+            self._thread.join()
+
+    def _check_error(self) -> None:
+        if self.error is not None:
+            raise RuntimeError(f"Checkpoint writer failed: {self.error!r}") from self.error
+
+    def _worker(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if not self._pending:
+                    return
+                checkpoint = self._pending.popleft()
+                self._writing = True
+                self._cond.notify_all()
+            try:
+                self._write(checkpoint)
+            except Exception as e:
+                logger.exception("Failed to write checkpoint %s", checkpoint['step'])
+                with self._cond:
+                    self.error = e
+            finally:
+                with self._cond:
+                    self._writing = False
+                    self._cond.notify_all()
+
+    def _write(self, checkpoint: dict) -> None:
+        step, score = checkpoint['step'], checkpoint['score']
+        name = f"ckpt-{step:08d}.pt"
+        atomic_save(checkpoint, os.path.join(self.directory, name))
+
+        is_best = score is not None and score > self.best_score
+        entry = {'step': step, 'score': score, 'time': checkpoint['time'], 'file': name}
+        index = [e for e in self.index if e['file'] != name] + [entry]
+        keep = self._retained(index)
+        index = [e for e in index if e['file'] in keep]
+        _replace_atomically(os.path.join(self.directory, INDEX_NAME),
+                            lambda f: f.write(json.dumps(index, indent=1).encode()))
+        with self._cond:
+            removed = [e['file'] for e in self.index if e['file'] not in keep]
+            self.index = index
+            self.saved += 1
+        # Файли видаляються лише після того, як новий індекс на диску
+        for file in removed:
+            try:
+                os.remove(os.path.join(self.directory, file))
+            except FileNotFoundError:
+                pass
+
+        if is_best and self.best_weights:
+            atomic_save(checkpoint['agent']['policy_net'], self.best_weights)
+
+    def _retained(self, index: list) -> set:
+        by_step = sorted(index, key=lambda e: e['step'], reverse=True)[:self.keep_last]
+        scored = [e for e in index if e['score'] is not None]
+        by_score = sorted(scored, key=lambda e: e['score'], reverse=True)[:self.keep_best]
+        return {e['file'] for e in by_step + by_score}
@@ -1,14 +1,153 @@
 import numpy as np
 import random
-from typing import List, Tuple, Dict
+from typing import List, Tuple, Dict, Optional
+
+# Квантування каналів спостереження для obs_dtype=uint8: value = q * scale + offset.
+# Бінарні канали (0, 1, 2, 4) зберігаються як є, distance map (3) та прогрес (7)
+# лежать у [0, 1], напрямки (5, 6) - у [-1, 1]
+UINT8_SCALE = np.array([1, 1, 1, 1 / 255, 1, 1 / 127, 1 / 127, 1 / 255], dtype=np.float32)
+UINT8_OFFSET = np.array([0, 0, 0, 0, 0, -1, -1, 0], dtype=np.float32)
+
+
+def encode_observation(planes: np.ndarray, dtype) -> np.ndarray:
+    """Перетворює float-спостереження (..., C, H, W) у заданий dtype"""
+    if np.dtype(dtype) != np.uint8:
+        return planes.astype(dtype, copy=False)
+    c = planes.shape[-3]
+    scale = UINT8_SCALE[:c, None, None]
+    offset = UINT8_OFFSET[:c, None, None]
+    return np.rint((planes - offset) / scale).astype(np.uint8)
+
+
+def l1_distance_transform(mask: np.ndarray) -> np.ndarray:
+    """Манхеттенська відстань від кожної клітинки до найближчої True у mask.
+
+    Працює по двох останніх осях, тож приймає і одну дошку (H, W), і пакет
+    (..., H, W). Відстань сепарабельна: спершу вздовж рядків, потім
+    уздовж стовпців, і кожен 1D-прохід - це два накопичувальні мінімуми
+    (d[i] = min(d[k] + |i - k|) розкладається на i + min(d[k] - k) для
+    k <= i та -i + min(d[k] + k) для k >= i). Тож O(H * W) незалежно від
+    кількості монет. Для дошок без жодної True повертає H + W.
+    """
+    h, w = mask.shape[-2:]
+    d = np.where(mask, 0, h + w).astype(np.int64)
+    for axis, n in ((-1, w), (-2, h)):
+        idx = np.arange(n) if axis == -1 else np.arange(n)[:, None]
+        forward = np.minimum.accumulate(d - idx, axis=axis) + idx
+        backward = np.flip(np.minimum.accumulate(np.flip(d + idx, axis=axis), axis=axis), axis=axis) - idx
+        d = np.minimum(forward, backward)
+    return d
+
+
+def nearest_coin(coin_i: np.ndarray, coin_j: np.ndarray, agent_i, agent_j,
+                 alive: Optional[np.ndarray] = None) -> np.ndarray:
+    """Індекс найближчої (L1) монети; при рівності - перша за порядком.
+
+    Монети - по останній осі (..., n_coins), агенти - (...), тож пакет
+    дошок обробляється одним argmin; ``alive`` виключає зібрані монети.
+    """
+    dist = np.abs(coin_i - np.asarray(agent_i)[..., None]) + np.abs(coin_j - np.asarray(agent_j)[..., None])
+    if alive is not None:
+        dist = np.where(alive, dist, np.iinfo(np.int64).max)
+    return dist.argmin(axis=-1)
+
+
+# Для списку з кількох десятків монет min у Python дешевший за перетворення
+# в масиви; argmin окупається лише для більших наборів
+NEAREST_PYTHON_MAX = 64
+
+
+def coin_direction(coins, agent_pos) -> Tuple[float, float]:
+    """Нормований (max-нормою) напрямок від агента до найближчої монети"""
+    ai, aj = agent_pos
+    if len(coins) <= NEAREST_PYTHON_MAX:
+        closest = min(coins, key=lambda c: abs(c[0] - ai) + abs(c[1] - aj))
+    else:
+        ci, cj = np.asarray(coins).T
+        k = nearest_coin(ci, cj, ai, aj)
+        closest = (int(ci[k]), int(cj[k]))
+    dx = closest[0] - ai
+    dy = closest[1] - aj
+    dist = max(abs(dx), abs(dy), 1)
+    return dx / dist, dy / dist
+
+
+# До цієї кількості пар (монета, клітинка) пряме порівняння з кожною монетою
+# швидше за проходи перетворення відстані з їхніми сталими накладними витратами
+DIRECT_DISTANCE_MAX = 4096
+
+
+def coin_distance_map(size: int, coin_i, coin_j, alive: Optional[np.ndarray] = None) -> np.ndarray:
+    """L1-відстань від кожної клітинки до найближчої живої монети.
+
+    coin_i, coin_j (і alive) мають форму (..., n_coins), результат -
+    (..., size, size); для дошок без живих монет значення не менше 2 * size.
+    Малі задачі рахуються прямим порівнянням, решта - l1_distance_transform
+    за O(size²) незалежно від кількості монет.
+    """
+    coin_i, coin_j = np.asarray(coin_i), np.asarray(coin_j)
+    n_coins = coin_i.shape[-1]
+    if n_coins * size * size <= DIRECT_DISTANCE_MAX:
+        # Вісь монет перед осями дошки: мінімум по короткій останній осі повільний
+        cells = np.arange(size)
+        dist = (np.abs(cells[:, None] - coin_i[..., None, None]) +
+                np.abs(cells - coin_j[..., None, None]))
+        if alive is not None:
+            dist = np.where(alive[..., None, None], dist, 2 * size)
+        return dist.min(axis=-3)
+
+    # Маска монет; зібрані монети пишуться в додаткову фіктивну клітинку
+    batch = coin_i.shape[:-1]
+    flat = (coin_i * size + coin_j).reshape(-1, n_coins)
+    if alive is not None:
+        flat = np.where(alive.reshape(-1, n_coins), flat, size * size)
+    mask = np.zeros((len(flat), size * size + 1), dtype=bool)
+    mask[np.arange(len(flat))[:, None], flat] = True
+    return l1_distance_transform(mask[:, :-1].reshape(*batch, size, size))
+
+
+def build_observation(size: int, agent_pos, coins, obstacles) -> np.ndarray:
+    """7-канальне float64 спостереження SimplifiedGameEnv з позицій об'єктів.
+
+    Дає те саме, що update_grid, без екземпляра середовища: сервер
+    відновлює ним повну сітку з компактних знімків позицій.
+    """
+    grid = np.zeros((7, size, size))
+
+    # Базові канали
+    grid[0, agent_pos[0], agent_pos[1]] = 1
+    for coin in coins:
+        grid[1, coin[0], coin[1]] = 1
+    for obs in obstacles:
+        grid[2, obs[0], obs[1]] = 1
+
+    if len(coins):
+        # Distance map для монет
+        ci, cj = np.asarray(coins).T
+        grid[3] = 1 - coin_distance_map(size, ci, cj) / (2 * size)
+
+        # Напрямок до найближчої монети (при рівності - перша за порядком)
+        dx, dy = coin_direction(coins, agent_pos)
+        grid[5].fill(dx)
+        grid[6].fill(dy)
+
+    # Вільний простір
+    grid[4] = 1 - (grid[0] + grid[1] + grid[2])
+    return grid
+
 
 class SimplifiedGameEnv:
     def __init__(self, size: int = 6, n_coins: int = 1, n_obstacles: int = 2,
-                 dynamic_obstacles: bool = False, rewards: dict = None):
+                 dynamic_obstacles: bool = False, rewards: dict = None,
+                 incremental: bool = False, obs_dtype=np.float64,
+                 obs_buffers: int = 0):
         self.size = size
         self.n_coins = n_coins
         self.n_obstacles = n_obstacles
         self.dynamic_obstacles = dynamic_obstacles
+        # Інкрементальне оновлення спостереження: step змінює лише клітинки,
+        # що змінились, замість повного update_grid
+        self.incremental = incremental
         self.rewards = rewards or {
             'coinCollected': 1,
             'collision': -1,
@@ -20,7 +159,15 @@ class SimplifiedGameEnv:
         self.observation_space_shape = (7, size, size)
         self.max_steps = size * size
         self.steps = 0
-        self.grid = np.zeros((7, size, size))
+        # float64 зберігає попередню поведінку, float32 / uint8 - компактні варіанти
+        self.obs_dtype = np.dtype(obs_dtype)
+        # obs_buffers > 0: get_state пише в кільце з obs_buffers попередньо
+        # виділених масивів замість нової копії на кожному кроці. Повернутий
+        # масив валідний, доки кільце не зробить повне коло, тому споживач
+        # має копіювати його (як це робить ReplayMemory)
+        self.obs_buffers = obs_buffers
+        self._obs_rings = {}
+        self.grid = np.zeros((7, size, size), dtype=self.obs_dtype)
         self.score = 0
         self.reset()
 
@@ -67,30 +214,75 @@ class SimplifiedGameEnv:
         for obs in self.obstacles:
             self.grid[2, obs[0], obs[1]] = 1
 
-        # Distance map для монет
-        if self.coins:
-            for i in range(self.size):
-                for j in range(self.size):
-                    min_dist = min(abs(i - coin[0]) + abs(j - coin[1])
-                                 for coin in self.coins)
-                    self.grid[3, i, j] = 1 - min_dist / (2 * self.size)
+        self._update_distance_plane()
 
         # Вільний простір
         self.grid[4] = 1 - (self.grid[0] + self.grid[1] + self.grid[2])
 
+        self._update_direction_planes()
+
+    def _update_distance_plane(self) -> None:
+        # Distance map для монет
+        if self.coins:
+            ci, cj = np.asarray(self.coins).T
+            min_dist = coin_distance_map(self.size, ci, cj)
+            self.grid[3] = self._encode(3, 1 - min_dist / (2 * self.size))
+        else:
+            self.grid[3].fill(0)
+
+    def _update_direction_planes(self) -> None:
         # Додаємо напрямки до найближчої монети
         if self.coins:
-            closest_coin = min(self.coins,
-                             key=lambda c: abs(c[0] - self.agent_pos[0]) +
-                                         abs(c[1] - self.agent_pos[1]))
-            dx = closest_coin[0] - self.agent_pos[0]
-            dy = closest_coin[1] - self.agent_pos[1]
-            dist = max(abs(dx), abs(dy), 1)
-            self.grid[5].fill(dx / dist)
-            self.grid[6].fill(dy / dist)
-
-    def get_state(self) -> np.ndarray:
-        return self.grid.copy()
+            dx, dy = coin_direction(self.coins, self.agent_pos)
+            self.grid[5].fill(self._encode(5, dx))
+            self.grid[6].fill(self._encode(6, dy))
+        else:
+            self.grid[5].fill(self._encode(5, 0))
+            self.grid[6].fill(self._encode(6, 0))
+
+    def _encode(self, channel: int, value: float):
+        # Значення неперервного каналу у форматі self.grid
+        if self.obs_dtype != np.uint8:
+            return value
+        return np.rint((value - UINT8_OFFSET[channel]) / UINT8_SCALE[channel])
+
+    def _update_dirty_cells(self, old_pos: List[int], collected_coin: List[int],
+                            moved_obstacles: List[Tuple[List[int], List[int]]]) -> None:
+        # Оновлюємо лише клітинки, які змінилися за крок
+        dirty = [old_pos, self.agent_pos]
+        self.grid[0, old_pos[0], old_pos[1]] = 0
+        self.grid[0, self.agent_pos[0], self.agent_pos[1]] = 1
+        if collected_coin is not None:
+            self.grid[1, collected_coin[0], collected_coin[1]] = 0
+        for old, new in moved_obstacles:
+            self.grid[2, old[0], old[1]] = 0
+            self.grid[2, new[0], new[1]] = 1
+            dirty.extend((old, new))
+
+        for i, j in dirty:
+            self.grid[4, i, j] = 1 - (self.grid[0, i, j] + self.grid[1, i, j] + self.grid[2, i, j])
+
+        # Distance map залежить лише від набору монет
+        if collected_coin is not None:
+            self._update_distance_plane()
+        if collected_coin is not None or self.agent_pos != old_pos:
+            self._update_direction_planes()
+
+    def _next_obs_buffer(self, shape: Tuple[int, ...]) -> np.ndarray:
+        if not self.obs_buffers:
+            return np.empty(shape, dtype=self.obs_dtype)
+        ring = self._obs_rings.get(shape)
+        if ring is None:
+            ring = self._obs_rings[shape] = [np.empty((self.obs_buffers, *shape), dtype=self.obs_dtype), 0]
+        buffers, index = ring
+        ring[1] = (index + 1) % self.obs_buffers
+        return buffers[index]
+
+    def get_state(self, out: Optional[np.ndarray] = None) -> np.ndarray:
+        if out is None:
+            out = self._next_obs_buffer(self.grid.shape)
+        np.copyto(out, self.grid)
+        return out
 
     def step(self, action: int) -> Tuple[np.ndarray, float, bool, bool, Dict]:
         self.steps += 1
@@ -104,6 +296,7 @@ class SimplifiedGameEnv:
         self.agent_pos[1] = np.clip(self.agent_pos[1] + dy, 0, self.size - 1)
 
         # Перевірка колізій та винагород
+        collected_coin = None
         if self.agent_pos in self.obstacles:
             self.agent_pos = old_pos
             reward = self.rewards['collision']
@@ -115,6 +308,7 @@ class SimplifiedGameEnv:
             # Збір монет
             if self.agent_pos in self.coins:
                 self.coins.remove(self.agent_pos)
+                collected_coin = list(self.agent_pos)
                 reward = self.rewards['coinCollected']
                 self.score += 1
                 if not self.coins:
@@ -127,10 +321,14 @@ class SimplifiedGameEnv:
                 done = True
 
         # Динамічні перешкоди
+        moved_obstacles = []
         if self.dynamic_obstacles and not done and random.random() < 0.1:
-            self._update_dynamic_obstacles()
+            moved_obstacles = self._update_dynamic_obstacles()
 
-        self.update_grid()
+        if self.incremental:
+            self._update_dirty_cells(old_pos, collected_coin, moved_obstacles)
+        else:
+            self.update_grid()
         info = {
             "score": self.score,
             "steps": self.steps,
@@ -139,8 +337,9 @@ class SimplifiedGameEnv:
 
         return self.get_state(), reward, done, False, info
 
-    def _update_dynamic_obstacles(self):
+    def _update_dynamic_obstacles(self) -> List[Tuple[List[int], List[int]]]:
         # Рухаємо кожну перешкоду з певною ймовірністю
+        moved = []
         for i, obs in enumerate(self.obstacles):
             if random.random() < 0.3:  # 30% шанс руху
                 possible_moves = [
@@ -154,7 +353,9 @@ class SimplifiedGameEnv:
                     if (new_pos != self.agent_pos and
                         new_pos not in self.coins and
                         new_pos not in self.obstacles):
+                        moved.append((obs, new_pos))
                         self.obstacles[i] = new_pos
+        return moved
 
     def render(self) -> None:
         grid = [[' ' for _ in range(self.size)] for _ in range(self.size)]
@@ -166,4 +367,12 @@ class SimplifiedGameEnv:
         grid[self.agent_pos[0]][self.agent_pos[1]] = 'A'
 
         print("\n".join([''.join(row) for row in grid]))
-        print(f"Score: {self.score}, Steps: {self.steps}")
\ No newline at end of file
+        print(f"Score: {self.score}, Steps: {self.steps}")
+
+    def close(self) -> None:
+        # Ресурсів, що потребують звільнення, немає; сумісність з інтерфейсом gym
+        pass
+
+
+# Сумісність з модулями, що очікують стару назву класу
+EnhancedGameEnv = SimplifiedGameEnv
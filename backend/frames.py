@@ -0,0 +1,109 @@
+# frames.py
+import struct
+from typing import Optional
+from environment import build_observation
+
+# Формати стану, які клієнт може запросити через config['stateFormat']
+STATE_FORMATS = ('json', 'binary')
+
+# Бінарні кадри (little-endian, клітинки як i * size + j у uint16):
+#   KEY:   u8 type, u8 size, u16 agent, u16 n_coins, u16 n_obstacles,
+#          coins[n_coins], obstacles[n_obstacles]
+#   DELTA: u8 type, u8 size, u16 agent, u16 coins_removed, u16 coins_added,
+#          u16 obstacles_removed, u16 obstacles_added, далі клітинки у цьому порядку
+FRAME_KEY = 1
+FRAME_DELTA = 2
+_KEY_HEADER = struct.Struct('<BBHHH')
+_DELTA_HEADER = struct.Struct('<BBHHHHH')
+
+
+def check_state_format(state_format: str) -> str:
+    if state_format not in STATE_FORMATS:
+        raise ValueError(f"Unknown state format {state_format!r}, expected one of {STATE_FORMATS}")
+    return state_format
+
+
+def snapshot(env) -> dict:
+    """Компактний знімок позицій для state-повідомлення"""
+    size = env.size
+    return {
+        "size": size,
+        "agent": env.agent_pos[0] * size + env.agent_pos[1],
+        "coins": [i * size + j for i, j in env.coins],
+        "obstacles": [i * size + j for i, j in env.obstacles]
+    }
+
+
+def snapshot_to_grid(state: dict) -> list:
+    """JSON-формат: повна 7-канальна сітка, як env.grid.tolist()"""
+    size = state["size"]
+    return build_observation(
+        size,
+        divmod(state["agent"], size),
+        [divmod(cell, size) for cell in state["coins"]],
+        [divmod(cell, size) for cell in state["obstacles"]]
+    ).tolist()
+
+
+def _pack_cells(*groups) -> bytes:
+    cells = [cell for group in groups for cell in group]
+    return struct.pack(f'<{len(cells)}H', *cells)
+
+
+class FrameEncoder:
+    """Кодує знімки у бінарні кадри для одного з'єднання.
+
+    Дельта рахується відносно останнього кадру, який справді пішов клієнту,
+    тож пропущені (злиті) знімки не ламають відновлення стану. Якщо дельта
+    не коротша за ключовий кадр (наприклад, новий епізод), надсилається
+    ключовий кадр.
+    """
+
+    def __init__(self):
+        self.last = None
+
+    def encode(self, state: dict) -> bytes:
+        last = self.last
+        self.last = state
+        key = (_KEY_HEADER.pack(FRAME_KEY, state["size"], state["agent"],
+                                len(state["coins"]), len(state["obstacles"])) +
+               _pack_cells(state["coins"], state["obstacles"]))
+        if last is None or last["size"] != state["size"]:
+            return key
+
+        coins, last_coins = set(state["coins"]), set(last["coins"])
+        obstacles, last_obstacles = set(state["obstacles"]), set(last["obstacles"])
+        # Порядок клітинок у групах стабільний, щоб кадри були детерміновані
+        groups = (sorted(last_coins - coins), sorted(coins - last_coins),
+                  sorted(last_obstacles - obstacles), sorted(obstacles - last_obstacles))
+        delta = (_DELTA_HEADER.pack(FRAME_DELTA, state["size"], state["agent"], *map(len, groups)) +
+                 _pack_cells(*groups))
+        return delta if len(delta) < len(key) else key
+
+
+def decode_frame(data: bytes, previous: Optional[dict] = None) -> dict:
+    """Зворотне до FrameEncoder.encode: знімок з кадру (і попереднього знімка для дельти)"""
+    frame_type = data[0]
+    if frame_type == FRAME_KEY:
+        _, size, agent, n_coins, n_obstacles = _KEY_HEADER.unpack_from(data)
+        cells = struct.unpack_from(f'<{n_coins + n_obstacles}H', data, _KEY_HEADER.size)
+        return {"size": size, "agent": agent, "coins": list(cells[:n_coins]),
+                "obstacles": list(cells[n_coins:])}
+    if frame_type != FRAME_DELTA:
+        raise ValueError(f"Unknown frame type {frame_type}")
+    if previous is None:
+        raise ValueError("Delta frame without a previous frame")
+
+    _, size, agent, *counts = _DELTA_HEADER.unpack_from(data)
+    cells = struct.unpack_from(f'<{sum(counts)}H', data, _DELTA_HEADER.size)
+    groups, start = [], 0
+    for count in counts:
+        groups.append(set(cells[start:start + count]))
+        start += count
+    coins_removed, coins_added, obstacles_removed, obstacles_added = groups
+    return {
+        "size": size,
+        "agent": agent,
+        "coins": [c for c in previous["coins"] if c not in coins_removed] + sorted(coins_added),
+        "obstacles": [o for o in previous["obstacles"] if o not in obstacles_removed] + sorted(obstacles_added)
+    }
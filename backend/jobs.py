@@ -0,0 +1,414 @@
+# jobs.py
+import asyncio
+import itertools
+import logging
+import os
+import queue
+import threading
+import time
+import multiprocessing as mp
+from collections import deque
+from typing import Dict, List, Optional
+from fastapi import APIRouter, HTTPException, WebSocket
+from fastapi.responses import PlainTextResponse
+from training import run_training
+from frames import check_state_format
+from sender import OutboundSender
+from metrics import Metrics, render_prometheus
+from metrics_store import MetricsStore
+from checkpoint import latest_checkpoint
+
+logger = logging.getLogger(__name__)
+
+# Стани завдання
+QUEUED, RUNNING, COMPLETED, FAILED, CANCELLED = 'queued', 'running', 'completed', 'failed', 'cancelled'
+FINAL_STATES = (COMPLETED, FAILED, CANCELLED)
+
+# Поля progress-повідомлень, що зберігаються в історії завдання
+HISTORY_SERIES = ('score', 'loss', 'epsilon', 'steps')
+
+
+def available_cores() -> int:
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def _job_worker(config: dict, events, cancel, threads: int) -> None:
+    # Кожен процес отримує свою частку ядер замість боротьби за всі
+    import torch
+    torch.set_num_threads(threads)
+    try:
+        run_training(config, events.put, cancel.is_set)
+        if not cancel.is_set():
+            events.put({"type": "complete", "data": "Training completed successfully"})
+    except Exception as e:
+        logger.error(f"Error during training: {str(e)}", exc_info=True)
+        events.put({"type": "error", "data": str(e)})
+    finally:
+        # Позначка кінця потоку подій
+        events.put(None)
+
+
+def resolve_name(root: str, name) -> str:
+    """Шлях ``root/name`` для назви, отриманої від клієнта.
+
+    Назва має бути одним компонентом шляху: абсолютні шляхи, '..' та
+    вкладені директорії відхиляються.
+    """
+    name = str(name)
+    if name in ('', '.', '..') or os.path.basename(name) != name or os.path.isabs(name):
+        raise ValueError(f"Invalid name: {name!r}")
+    return os.path.join(root, name)
+
+
+class Job:
+    def __init__(self, job_id: str, config: dict):
+        self.id = job_id
+        self.config = config
+        self.status = QUEUED
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.process = None
+        self.events = None
+        self.cancel_event = None
+        self.subscribers = set()
+        # Останній знімок гістограм фаз від процесу тренування
+        self.metrics = None
+        # Останнє повідомлення кожного типу - для нових підписників
+        self.last_messages = {}
+        # Історія progress-повідомлень у пам'яті фіксованого розміру
+        self.history = MetricsStore()
+
+    def to_dict(self) -> dict:
+        progress = self.last_messages.get('progress')
+        return {
+            "id": self.id,
+            "status": self.status,
+            "error": self.error,
+            "createdAt": self.created_at,
+            "startedAt": self.started_at,
+            "finishedAt": self.finished_at,
+            "progress": progress["data"] if progress else None,
+            "config": self.config
+        }
+
+
+class JobManager:
+    """Черга тренувань, що виконуються в обмеженій кількості процесів.
+
+    Одночасно працює не більше ``max_workers`` завдань (за замовчуванням -
+    кількість доступних ядер), кожне в окремому spawn-процесі з
+    ``threads_per_job`` потоками torch; решта чекає в черзі. Події процесу
+    читає окремий потік і передає в event loop, звідки вони розсилаються
+    підписникам (будь-що з неблокуючим ``put_nowait``, зазвичай
+    OutboundSender). ``None`` означає кінець потоку.
+
+    Кожне завдання пише чекпойнти в ``checkpoint_root/<id>``;
+    ``config['resumeFrom']`` з id попереднього завдання (зокрема до
+    перезапуску сервера) продовжує тренування з його останнього чекпойнта.
+    Шляхи ``checkpointDir``/``resumeDir``/``recordDir`` від клієнта ігноруються.
+    ``config['record']`` вмикає запис усіх переходів у ``record_root/<id>``.
+    ``agentConfig.memoryDir`` - назва директорії replay memory у
+    ``memory_root``; одну директорію не можуть використовувати два
+    незавершені завдання.
+
+    У ``jobs`` зберігаються не більше ``max_finished_jobs`` завершених
+    завдань (з їхньою історією); старіші видаляються, але їхні чекпойнти
+    лишаються доступними через ``resumeFrom``.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, threads_per_job: Optional[int] = None,
+                 checkpoint_root: str = 'checkpoints', record_root: str = 'recordings',
+                 memory_root: str = 'replay_memory', max_finished_jobs: int = 100):
+        cores = available_cores()
+        self.max_workers = max_workers or cores
+        self.threads_per_job = threads_per_job or max(1, cores // self.max_workers)
+        self.jobs: Dict[str, Job] = {}
+        self.pending = deque()
+        self._ctx = mp.get_context('spawn')
+        self._ids = itertools.count(1)
+        self.checkpoint_root = checkpoint_root
+        self.record_root = record_root
+        self.memory_root = memory_root
+        self.max_finished_jobs = max_finished_jobs
+        self._loop = None
+        # Фази, що виконуються в процесі сервера (ws_send)
+        self.metrics = Metrics()
+
+    @property
+    def running(self) -> List[Job]:
+        return [job for job in self.jobs.values() if job.status == RUNNING]
+
+    def submit(self, config: dict) -> Job:
+        # Викликається з event loop, куди потім надходитимуть події
+        self._loop = asyncio.get_running_loop()
+        config = dict(config)
+        # Шляхи на диску сервера визначає лише сервер
+        for key in ('checkpointDir', 'resumeDir', 'recordDir'):
+            config.pop(key, None)
+        resume_from = config.get('resumeFrom')
+        if resume_from:
+            resume_dir = resolve_name(self.checkpoint_root, resume_from)
+            if latest_checkpoint(resume_dir) is None:
+                raise ValueError(f"No checkpoint found for job {resume_from}")
+            config['resumeDir'] = resume_dir
+        memory_name = config.get('agentConfig', {}).get('memoryDir')
+        if memory_name:
+            memory_dir = resolve_name(self.memory_root, memory_name)
+            # Два процеси в одному memmap-кільці псували б записи один одного
+            if any(job.status not in FINAL_STATES and job.config.get('agentConfig', {}).get('memoryDir') == memory_dir
+                   for job in self.jobs.values()):
+                raise ValueError(f"Replay memory {memory_name} is in use by another job")
+            config['agentConfig'] = {**config['agentConfig'], 'memoryDir': memory_dir}
+        job_id = self._new_id()
+        config['checkpointDir'] = os.path.join(self.checkpoint_root, job_id)
+        if config.get('record'):
+            config['recordDir'] = os.path.join(self.record_root, job_id)
+        job = Job(job_id, config)
+        self.jobs[job.id] = job
+        self.pending.append(job)
+        self._schedule()
+        return job
+
+    def _new_id(self) -> str:
+        # Директорії чекпойнтів попередніх запусків сервера не перезаписуються
+        while True:
+            job_id = f"job-{next(self._ids)}"
+            if not os.path.exists(os.path.join(self.checkpoint_root, job_id)):
+                return job_id
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self.jobs.get(job_id)
+
+    def queue_position(self, job: Job) -> Optional[int]:
+        if job.status != QUEUED:
+            return None
+        return list(self.pending).index(job)
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        job = self.jobs.get(job_id)
+        if job is None or job.status in FINAL_STATES:
+            return job
+        if job.status == QUEUED:
+            self.pending.remove(job)
+            self._finish(job, CANCELLED)
+        else:
+            # Процес зупиниться на наступному кроці тренування
+            job.cancel_event.set()
+        return job
+
+    def subscribe(self, job: Job, subscriber) -> None:
+        for message in job.last_messages.values():
+            subscriber.put_nowait(message)
+        if job.status in FINAL_STATES:
+            subscriber.put_nowait(None)
+        else:
+            job.subscribers.add(subscriber)
+
+    def unsubscribe(self, job: Job, subscriber) -> None:
+        job.subscribers.discard(subscriber)
+
+    def _schedule(self) -> None:
+        while self.pending and len(self.running) < self.max_workers:
+            self._start(self.pending.popleft())
+
+    def _start(self, job: Job) -> None:
+        job.events = self._ctx.Queue()
+        job.cancel_event = self._ctx.Event()
+        job.process = self._ctx.Process(
+            target=_job_worker,
+            args=(job.config, job.events, job.cancel_event, self.threads_per_job),
+            daemon=True
+        )
+        job.process.start()
+        job.status = RUNNING
+        job.started_at = time.time()
+        threading.Thread(target=self._read_events, args=(job,), name=f"{job.id}-events",
+                         daemon=True).start()
+        logger.info(f"Started {job.id} ({len(self.running)}/{self.max_workers} workers busy)")
+
+    def _read_events(self, job: Job) -> None:
+        while True:
+            try:
+                message = job.events.get(timeout=0.5)
+            except queue.Empty:
+                if job.process.is_alive():
+                    continue
+                # Процес завершився, не надіславши позначку кінця
+                message = {"type": "error", "data": f"Worker exited with code {job.process.exitcode}"}
+                self._loop.call_soon_threadsafe(self._dispatch, job, message)
+                message = None
+            self._loop.call_soon_threadsafe(self._dispatch, job, message)
+            if message is None:
+                job.process.join(timeout=5)
+                return
+
+    def _dispatch(self, job: Job, message: Optional[dict]) -> None:
+        if message is None:
+            if job.cancel_event.is_set():
+                self._finish(job, CANCELLED)
+            else:
+                self._finish(job, FAILED if job.error else COMPLETED)
+            self._schedule()
+            return
+        if message["type"] == "metrics":
+            job.metrics = message["data"]
+            return
+        if message["type"] == "error":
+            job.error = message["data"]
+        elif message["type"] == "progress":
+            data = message["data"]
+            job.history.record(data["episode"], {key: data.get(key) for key in HISTORY_SERIES})
+        job.last_messages[message["type"]] = message
+        for subscriber in job.subscribers:
+            subscriber.put_nowait(message)
+
+    def _finish(self, job: Job, status: str) -> None:
+        job.status = status
+        job.finished_at = time.time()
+        for subscriber in job.subscribers:
+            subscriber.put_nowait(None)
+        job.subscribers.clear()
+        logger.info(f"{job.id} {status}")
+        # Пам'ять сервера не росте з кожним поданим завданням
+        finished = [job for job in self.jobs.values() if job.status in FINAL_STATES]
+        for job in finished[:max(0, len(finished) - self.max_finished_jobs)]:
+            del self.jobs[job.id]
+
+    def shutdown(self) -> None:
+        for job in list(self.pending):
+            self.cancel(job.id)
+        for job in self.running:
+            job.cancel_event.set()
+        for job in self.running:
+            job.process.join(timeout=5)
+            if job.process.is_alive():
+                job.process.terminate()
+
+
+async def stream_job(websocket: WebSocket, manager: JobManager, job: Job,
+                     cancel_on_disconnect: bool = False, state_format: str = 'json',
+                     fps: float = 20) -> None:
+    """Пересилає повідомлення завдання у websocket до його завершення.
+
+    Повідомлення проходять через OutboundSender з'єднання: процес тренування
+    ніколи не чекає на сокет, а повільний клієнт отримує лише останній стан
+    (не частіше ``fps`` кадрів на секунду) і пакети progress. Знімки стану
+    кодуються під це з'єднання: 'binary' - бінарні ключові та дельта-кадри,
+    'json' - повна сітка. Відключення клієнта лише відписує його, а з
+    ``cancel_on_disconnect`` ще й скасовує завдання.
+    """
+    sender = OutboundSender(websocket, state_format, fps, metrics=manager.metrics)
+    manager.subscribe(job, sender)
+
+    async def watch_disconnect() -> None:
+        while True:
+            message = await websocket.receive()
+            if message['type'] == 'websocket.disconnect':
+                sender.close()
+                return
+
+    watcher = asyncio.ensure_future(watch_disconnect())
+    finished = False
+    try:
+        finished = await sender.run()
+    finally:
+        manager.unsubscribe(job, sender)
+        watcher.cancel()
+        logger.info(f"{job.id} stream closed: {sender.stats()}")
+        if not finished and cancel_on_disconnect:
+            logger.warning(f"Client disconnected, cancelling {job.id}")
+            manager.cancel(job.id)
+
+
+def create_router(manager: JobManager) -> APIRouter:
+    """REST та websocket маршрути для керування завданнями"""
+    router = APIRouter()
+
+    def _get_job(job_id: str) -> Job:
+        job = manager.get(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+        return job
+
+    @router.get("/metrics", response_class=PlainTextResponse)
+    async def metrics():
+        sources = [({"job": job.id}, job.metrics) for job in manager.jobs.values() if job.metrics]
+        sources.append(({"job": "server"}, manager.metrics.snapshot()))
+        statuses = [job.status for job in manager.jobs.values()]
+        return render_prometheus(sources, gauges={
+            "rl_jobs": ("Training jobs by status",
+                        {f'status="{s}"': statuses.count(s) for s in (QUEUED, RUNNING) + FINAL_STATES}),
+            "rl_max_workers": ("Concurrent training job limit", {'': manager.max_workers})
+        })
+
+    @router.get("/jobs")
+    async def list_jobs():
+        return [job.to_dict() for job in manager.jobs.values()]
+
+    @router.post("/jobs", status_code=201)
+    async def create_job(config: dict):
+        try:
+            job = manager.submit(config)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return {**job.to_dict(), "queuePosition": manager.queue_position(job)}
+
+    @router.get("/jobs/{job_id}")
+    async def get_job(job_id: str):
+        job = _get_job(job_id)
+        return {**job.to_dict(), "queuePosition": manager.queue_position(job)}
+
+    @router.delete("/jobs/{job_id}")
+    async def cancel_job(job_id: str):
+        _get_job(job_id)
+        return manager.cancel(job_id).to_dict()
+
+    @router.get("/jobs/{job_id}/history")
+    async def job_history(job_id: str):
+        return {"id": job_id, "series": _get_job(job_id).history.series()}
+
+    @router.get("/jobs/{job_id}/history/{series}")
+    async def job_series(job_id: str, series: str, start: Optional[int] = None, end: Optional[int] = None,
+                         resolution: Optional[int] = None, maxPoints: Optional[int] = None):
+        history = _get_job(job_id).history
+        try:
+            return history.query(series, start, end, resolution, maxPoints)
+        except KeyError:
+            raise HTTPException(status_code=404, detail=f"Series {series} not found")
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    @router.post("/jobs/{job_id}/resume", status_code=201)
+    async def resume_job(job_id: str):
+        # Нове завдання з тією ж конфігурацією, що продовжує з останнього чекпойнта
+        config = {key: value for key, value in _get_job(job_id).config.items()
+                  if key not in ('checkpointDir', 'resumeDir', 'recordDir')}
+        # У конфігурації завдання - розв'язаний шлях, а submit очікує назву
+        memory_dir = config.get('agentConfig', {}).get('memoryDir')
+        if memory_dir:
+            config['agentConfig'] = {**config['agentConfig'], 'memoryDir': os.path.basename(memory_dir)}
+        try:
+            job = manager.submit({**config, 'resumeFrom': job_id})
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return {**job.to_dict(), "queuePosition": manager.queue_position(job)}
+
+    @router.websocket("/ws/jobs/{job_id}")
+    async def subscribe_job(websocket: WebSocket, job_id: str, format: str = 'json', fps: float = 20):
+        await websocket.accept()
+        job = manager.get(job_id)
+        try:
+            if job is None:
+                raise ValueError(f"Job {job_id} not found")
+            check_state_format(format)
+        except ValueError as e:
+            await websocket.send_json({"type": "error", "data": str(e)})
+            await websocket.close()
+            return
+        await stream_job(websocket, manager, job, state_format=format, fps=fps)
+
+    return router
@@ -1,16 +1,24 @@
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
 import json
-import asyncio
 import logging
-from environment import SimplifiedGameEnv
-from agent import SimplifiedAgent
+from contextlib import asynccontextmanager
+from jobs import JobManager, create_router, stream_job
+from frames import check_state_format
 
 # Налаштування логування
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
-app = FastAPI()
+# Тренування виконуються у процесах JobManager, не більше ніж по одному на ядро
+manager = JobManager()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    manager.shutdown()
+
+app = FastAPI(lifespan=lifespan)
 
 # Налаштування CORS
 app.add_middleware(
@@ -21,6 +29,8 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.include_router(create_router(manager))
+
 @app.websocket("/ws/train")
 async def train(websocket: WebSocket):
     logger.info("New WebSocket connection attempt")
@@ -34,81 +44,21 @@ async def train(websocket: WebSocket):
             logger.info(f"Received configuration: {config_str}")
             config = json.loads(config_str)
 
-            # Створюємо середовище
-            env = SimplifiedGameEnv(
-                size=config['envConfig']['size'],
-                n_coins=config['envConfig']['nCoins'],
-                n_obstacles=config['envConfig']['nObstacles']
-            )
-            logger.info("Environment created successfully")
-
-            # Створюємо агента
-            agent = SimplifiedAgent(
-                state_shape=(7, config['envConfig']['size'], config['envConfig']['size']),
-                n_actions=8,
-                learning_rate=config['agentConfig']['learningRate']
-            )
-            logger.info("Agent created successfully")
-
-            # Надсилаємо підтвердження
+            # Стан лише наприкінці епізодів для рендерингу
+            config.setdefault('renderSteps', False)
+            state_format = check_state_format(config.get('stateFormat', 'json'))
+            job = manager.submit(config)
+            position = manager.queue_position(job)
             await websocket.send_json({
                 "type": "status",
-                "data": "Training initialized successfully"
+                "data": f"{job.id} queued at position {position + 1}" if position is not None
+                else f"{job.id} started"
             })
 
-            # Цикл тренування
-            for episode in range(config['trainingConfig']['episodes']):
-                logger.info(f"Starting episode {episode}")
-
-                state = env.reset()
-                total_reward = 0
-                episode_losses = []
-
-                while True:
-                    action = agent.get_action(state)
-                    next_state, reward, done, _, info = env.step(action)
-
-                    agent.remember(state, action, reward, next_state, done)
-                    loss = agent.train()
-
-                    if loss is not None:
-                        episode_losses.append(float(loss))
-
-                    state = next_state
-                    total_reward += reward
-
-                    if done:
-                        break
-
-                agent.update_epsilon()
-                avg_loss = sum(episode_losses) / len(episode_losses) if episode_losses else 0
-
-                # Відправляємо прогрес
-                await websocket.send_json({
-                    "type": "progress",
-                    "data": {
-                        "episode": episode,
-                        "score": float(total_reward),
-                        "loss": float(avg_loss),
-                        "epsilon": float(agent.epsilon)
-                    }
-                })
-
-                # Відправляємо стан середовища
-                if episode % config['trainingConfig']['renderEvery'] == 0:
-                    await websocket.send_json({
-                        "type": "state",
-                        "data": env.grid.tolist()
-                    })
-
-                # Затримка для стабільності
-                await asyncio.sleep(0.01)
-
-            # Завершення тренування
-            await websocket.send_json({
-                "type": "complete",
-                "data": "Training completed successfully"
-            })
+            # Повідомлення завдання, включно з complete/error; відключення скасовує його
+            await stream_job(websocket, manager, job, cancel_on_disconnect=True,
+                             state_format=state_format,
+                             fps=config.get('targetFps', 20))
 
         except WebSocketDisconnect:
             logger.warning("Client disconnected")
@@ -0,0 +1,116 @@
+# metrics.py
+import time
+from bisect import bisect_left
+from typing import Dict, Iterable, Tuple
+
+# Межі кошиків гістограми в наносекундах: 1 мкс ... 10 с
+BUCKETS_NS = tuple(int(m * 10 ** e) for e in range(3, 10) for m in (1, 2.5, 5)) + (10 ** 10,)
+
+
+class PhaseHistogram:
+    """Лічильник, сума, максимум і гістограма тривалостей однієї фази"""
+
+    __slots__ = ('count', 'total_ns', 'max_ns', 'buckets')
+
+    def __init__(self):
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        # Останній кошик - усе, що довше за BUCKETS_NS[-1]
+        self.buckets = [0] * (len(BUCKETS_NS) + 1)
+
+    def observe(self, ns: int) -> None:
+        self.count += 1
+        self.total_ns += ns
+        if ns > self.max_ns:
+            self.max_ns = ns
+        self.buckets[bisect_left(BUCKETS_NS, ns)] += 1
+
+    def merge(self, data: dict) -> None:
+        self.count += data['count']
+        self.total_ns += data['total_ns']
+        self.max_ns = max(self.max_ns, data['max_ns'])
+        self.buckets = [a + b for a, b in zip(self.buckets, data['buckets'])]
+
+    def to_dict(self) -> dict:
+        return {'count': self.count, 'total_ns': self.total_ns, 'max_ns': self.max_ns,
+                'buckets': list(self.buckets)}
+
+
+class Metrics:
+    """Таймери фаз на монотонних наносекундних лічильниках.
+
+    Використання без контекстних менеджерів, щоб накладні витрати лишались
+    на рівні двох викликів perf_counter_ns:
+
+        start = time.perf_counter_ns()
+        ...
+        metrics.record('env_step', start)
+
+    На CUDA час forward/backward - це час постановки ядер у чергу, доки
+    щось (наприклад, ``loss.item()``) не синхронізує пристрій.
+    """
+
+    def __init__(self):
+        self.phases: Dict[str, PhaseHistogram] = {}
+
+    def record(self, phase: str, start_ns: int) -> int:
+        """Додає час від start_ns до тепер; повертає тепер (початок наступної фази)"""
+        now = time.perf_counter_ns()
+        histogram = self.phases.get(phase)
+        if histogram is None:
+            histogram = self.phases[phase] = PhaseHistogram()
+        histogram.observe(now - start_ns)
+        return now
+
+    def snapshot(self) -> dict:
+        return {phase: histogram.to_dict() for phase, histogram in self.phases.items()}
+
+    def merge(self, snapshot: dict) -> None:
+        for phase, data in snapshot.items():
+            self.phases.setdefault(phase, PhaseHistogram()).merge(data)
+
+    def summary(self) -> dict:
+        """Середній час (мс) і частка сумарного часу для кожної фази"""
+        total = sum(h.total_ns for h in self.phases.values()) or 1
+        return {
+            phase: {
+                "count": h.count,
+                "meanMs": round(h.total_ns / max(1, h.count) / 1e6, 4),
+                "maxMs": round(h.max_ns / 1e6, 3),
+                "share": round(h.total_ns / total, 4)
+            }
+            for phase, h in self.phases.items()
+        }
+
+
+def _labels(labels: dict) -> str:
+    return ','.join(f'{key}="{value}"' for key, value in labels.items())
+
+
+def render_prometheus(sources: Iterable[Tuple[dict, dict]], gauges: Dict[str, Tuple[str, dict]] = None) -> str:
+    """Текстовий формат Prometheus.
+
+    sources - пари (мітки, Metrics.snapshot()); гістограми фаз експортуються
+    як rl_phase_seconds з мітками джерела та фази. gauges - назва ->
+    (опис, {рядок міток або '': значення}).
+    """
+    lines = ['# HELP rl_phase_seconds Time spent per training phase',
+             '# TYPE rl_phase_seconds histogram']
+    for labels, snapshot in sources:
+        for phase, data in sorted(snapshot.items()):
+            base = _labels({**labels, 'phase': phase})
+            cumulative = 0
+            for bound, count in zip(BUCKETS_NS, data['buckets']):
+                cumulative += count
+                lines.append(f'rl_phase_seconds_bucket{{{base},le="{bound / 1e9:g}"}} {cumulative}')
+            lines.append(f'rl_phase_seconds_bucket{{{base},le="+Inf"}} {data["count"]}')
+            lines.append(f'rl_phase_seconds_sum{{{base}}} {data["total_ns"] / 1e9:.9f}')
+            lines.append(f'rl_phase_seconds_count{{{base}}} {data["count"]}')
+
+    for name, (description, values) in (gauges or {}).items():
+        lines.append(f'# HELP {name} {description}')
+        lines.append(f'# TYPE {name} gauge')
+        for labels, value in values.items():
+            lines.append(f'{name}{{{labels}}} {value}' if labels else f'{name} {value}')
+    return '\n'.join(lines) + '\n'
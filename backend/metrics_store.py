@@ -0,0 +1,155 @@
+# metrics_store.py
+import numpy as np
+from typing import Dict, Optional
+
+# Роздільні здатності рівнів: епізодів в одному кошику
+RESOLUTIONS = (1, 10, 100)
+
+
+class RollupLevel:
+    """Кільце з ``capacity`` кошиків по ``factor`` епізодів.
+
+    Кошик зберігає кількість, суму, мінімум і максимум значень своїх
+    епізодів; найстаріші кошики перезаписуються.
+    """
+
+    def __init__(self, factor: int, capacity: int):
+        self.factor = factor
+        self.capacity = capacity
+        self.bucket = np.full(capacity, -1, dtype=np.int64)
+        self.count = np.zeros(capacity, dtype=np.int64)
+        self.total = np.zeros(capacity)
+        self.min = np.zeros(capacity)
+        self.max = np.zeros(capacity)
+        # Слот поточного (найновішого) кошика
+        self.head = -1
+        self.size = 0
+
+    def add(self, episode: int, value: float) -> None:
+        bucket = episode // self.factor
+        k = self.head
+        if k < 0 or self.bucket[k] != bucket:
+            if k >= 0 and bucket < self.bucket[k]:
+                raise ValueError(f"Episode {episode} is older than the latest recorded one")
+            k = self.head = (k + 1) % self.capacity
+            self.size = min(self.size + 1, self.capacity)
+            self.bucket[k] = bucket
+            self.count[k] = 0
+            self.total[k] = 0.0
+            self.min[k] = np.inf
+            self.max[k] = -np.inf
+        self.count[k] += 1
+        self.total[k] += value
+        if value < self.min[k]:
+            self.min[k] = value
+        if value > self.max[k]:
+            self.max[k] = value
+
+    def _ordered(self) -> np.ndarray:
+        # Слоти від найстарішого до найновішого
+        return (self.head - self.size + 1 + np.arange(self.size)) % self.capacity
+
+    @property
+    def first_episode(self) -> Optional[int]:
+        if not self.size:
+            return None
+        return int(self.bucket[(self.head - self.size + 1) % self.capacity]) * self.factor
+
+    def select(self, start: int, end: int) -> np.ndarray:
+        """Слоти кошиків, що перетинаються з епізодами [start, end]"""
+        slots = self._ordered()
+        buckets = self.bucket[slots]
+        lo = np.searchsorted(buckets, start // self.factor, side='left')
+        hi = np.searchsorted(buckets, end // self.factor, side='right')
+        return slots[lo:hi]
+
+    def query(self, start: int, end: int) -> dict:
+        slots = self.select(start, end)
+        return {
+            "resolution": self.factor,
+            "episodes": (self.bucket[slots] * self.factor).tolist(),
+            "count": self.count[slots].tolist(),
+            "min": self.min[slots].tolist(),
+            "mean": (self.total[slots] / self.count[slots]).tolist(),
+            "max": self.max[slots].tolist()
+        }
+
+    @property
+    def nbytes(self) -> int:
+        return sum(a.nbytes for a in (self.bucket, self.count, self.total, self.min, self.max))
+
+
+class MetricsStore:
+    """Історія метрик по епізодах у пам'яті фіксованого розміру.
+
+    Кожна серія зберігається на рівнях RESOLUTIONS (сирі значення, кошики по
+    10 і по 100 епізодів з min/mean/max), кожен рівень - кільце з
+    ``capacity`` кошиків. Тож при capacity=1000 доступні останні 1000
+    епізодів поштучно, 10 000 - по 10 і 100 000 - по 100, а пам'ять не
+    залежить від тривалості тренування. Епізоди мають не спадати.
+    """
+
+    def __init__(self, capacity: int = 1000, resolutions=RESOLUTIONS):
+        self.capacity = capacity
+        self.resolutions = tuple(resolutions)
+        self._series: Dict[str, tuple] = {}
+        self.first_episode = None
+        self.last_episode = None
+
+    def record(self, episode: int, values: Dict[str, Optional[float]]) -> None:
+        for name, value in values.items():
+            if value is None:
+                continue
+            levels = self._series.get(name)
+            if levels is None:
+                levels = self._series[name] = tuple(RollupLevel(f, self.capacity) for f in self.resolutions)
+            for level in levels:
+                level.add(episode, float(value))
+        if self.first_episode is None:
+            self.first_episode = episode
+        self.last_episode = episode
+
+    def series(self) -> dict:
+        """Назви серій і найстаріший доступний епізод для кожної роздільності"""
+        return {
+            name: {str(level.factor): level.first_episode for level in levels}
+            for name, levels in self._series.items()
+        }
+
+    def query(self, name: str, start: Optional[int] = None, end: Optional[int] = None,
+              resolution: Optional[int] = None, max_points: Optional[int] = None) -> dict:
+        """Серія на епізодах [start, end].
+
+        Без ``resolution`` вибирається найдрібніший рівень, який ще містить
+        ``start`` (або все записане, якщо start раніше за перший епізод) і
+        дає не більше ``max_points`` точок (за замовчуванням - capacity);
+        якщо такого немає - найгрубший.
+        """
+        levels = self._series.get(name)
+        if levels is None:
+            raise KeyError(name)
+        if end is None:
+            end = self.last_episode if self.last_episode is not None else 0
+        if start is None:
+            start = 0
+
+        if resolution is not None:
+            if resolution not in self.resolutions:
+                raise ValueError(f"Resolution must be one of {self.resolutions}")
+            level = levels[self.resolutions.index(resolution)]
+        else:
+            max_points = max_points or self.capacity
+            # Кошик рівня, що містить перший записаний епізод, починається раніше за нього
+            covered = max(start, self.first_episode or 0)
+            level = levels[-1]
+            for candidate in levels:
+                first = candidate.first_episode
+                if (first is not None and first <= covered and
+                        len(candidate.select(start, end)) <= max_points):
+                    level = candidate
+                    break
+        return {"series": name, "start": start, "end": end, **level.query(start, end)}
+
+    @property
+    def nbytes(self) -> int:
+        return sum(level.nbytes for levels in self._series.values() for level in levels)
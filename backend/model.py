@@ -34,4 +34,18 @@ class SimpleNet(nn.Module):
 
     def forward(self, x):
         conv_out = self.conv(x)
-        return self.fc(conv_out.view(conv_out.size(0), -1))
\ No newline at end of file
+        return self.fc(conv_out.reshape(conv_out.size(0), -1))
+
+
+def compile_module(module: nn.Module, example: torch.Tensor) -> nn.Module:
+    """torch.compile з fallback на TorchScript, якщо компіляція недоступна.
+
+    Приклад проганяється одразу в поточному режимі градієнтів, тож граф
+    компілюється тут і помилки компілятора виявляються до навчання.
+    """
+    try:
+        compiled = torch.compile(module)
+        compiled(example)
+        return compiled
+    except Exception:
+        return torch.jit.trace(module, example)
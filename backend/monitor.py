@@ -1,38 +1,49 @@
 # monitor.py
 import numpy as np
-import matplotlib.pyplot as plt
 from collections import deque
 import time
-import wandb
-import seaborn as sns
-from IPython.display import clear_output
-import torch
 import torch.optim as optim
 from agent import Agent, ReplayBuffer
+from checkpoint import CheckpointManager, latest_checkpoint, load_checkpoint
+from metrics_store import MetricsStore
 
 
 class RLMonitor:
-    def __init__(self, window_size=100):
+    """Графіки тренування, що оновлюються на місці.
+
+    Лінії створюються один раз, а ``update_plots`` лише змінює їхні дані
+    (довга історія проріджується LTTB до ``max_points`` точок), тож
+    вартість рендерингу не залежить від кількості епізодів. Ковзні середні
+    рахуються за O(1). Рендеринг - кожні ``render_every`` епізодів;
+    ``headless`` пише графіки у файл ``output`` замість вікна.
+
+    Історія зберігається в MetricsStore з ``history_size`` кошиками на
+    рівень, тож пам'ять стала; ``scores``, ``losses`` тощо - останні
+    ``history_size`` епізодів.
+    """
+
+    def __init__(self, window_size=100, render_every=1, headless=False,
+                 output='training_monitor.png', max_points=2000, history_size=10000):
+        from plot_results import RunningMean, create_figure
+
         self.window_size = window_size
-        self.scores_window = deque(maxlen=window_size)
-        self.losses_window = deque(maxlen=window_size)
-        self.rewards_window = deque(maxlen=window_size)
-        self.steps_window = deque(maxlen=window_size)
-
-        self.scores = []
-        self.losses = []
-        self.avg_scores = []
-        self.epsilons = []
-        self.steps = []
-        self.rewards = []
+        self.render_every = render_every
+        self.headless = headless
+        self.output = output
+        self.max_points = max_points
+        self.scores_window = RunningMean(window_size)
+        self.losses_window = RunningMean(window_size)
+        self.rewards_window = RunningMean(window_size)
+        self.steps_window = RunningMean(window_size)
+
+        self.history = MetricsStore(capacity=history_size)
 
         # Performance metrics
         self.training_start = time.time()
         self.episode_times = deque(maxlen=window_size)
 
-        # Initialize plots
-        plt.ion()
-        self.fig = plt.figure(figsize=(15, 10))
+        # Initialize plots; matplotlib loads only when a monitor is created
+        self.fig = create_figure((15, 10), headless)
         self.initialize_plots()
 
     def initialize_plots(self):
@@ -53,137 +64,198 @@ class RLMonitor:
         self.ax_epsilon.set_title('Epsilon Value')
         self.ax_heatmap.set_title('Action Distribution')
 
-        plt.tight_layout()
+        # Lines are created once and only get new data afterwards
+        self.score_line, = self.ax_score.plot([], [], alpha=0.6, label='Score')
+        self.avg_score_line, = self.ax_score.plot([], [], label='Average Score')
+        self.ax_score.legend()
+        self.loss_line, = self.ax_loss.plot([], [], alpha=0.6)
+        self.steps_line, = self.ax_steps.plot([], [], alpha=0.6)
+        self.reward_line, = self.ax_reward.plot([], [], alpha=0.6)
+        self.epsilon_line, = self.ax_epsilon.plot([], [], alpha=0.6)
+        self.heatmap = None
+
+        self.fig.tight_layout()
 
     def update(self, episode, score, loss, epsilon, steps, rewards, action_dist=None):
+        mean_reward = np.mean(rewards)
+
         # Update windows
-        self.scores_window.append(score)
+        avg_score = self.scores_window.append(score)
         if loss is not None:
             self.losses_window.append(loss)
         self.steps_window.append(steps)
-        self.rewards_window.append(np.mean(rewards))
-
-        # Update lists
-        self.scores.append(score)
-        self.losses.append(loss if loss is not None else 0)
-        self.avg_scores.append(np.mean(self.scores_window))
-        self.epsilons.append(epsilon)
-        self.steps.append(steps)
-        self.rewards.append(np.mean(rewards))
+        self.rewards_window.append(mean_reward)
+
+        # Update history
+        self.history.record(episode, {
+            'score': score,
+            'loss': loss if loss is not None else 0,
+            'avg_score': avg_score,
+            'epsilon': epsilon,
+            'steps': steps,
+            'reward': mean_reward
+        })
 
         # Update plots
-        self.update_plots(episode, action_dist)
+        if (episode + 1) % self.render_every == 0:
+            self.update_plots(episode, action_dist)
 
-    def update_plots(self, episode, action_dist=None):
-        self.fig.clear()
-        self.initialize_plots()
+    def _raw(self, name):
+        # Останні history_size значень серії поштучно
+        if self.history.last_episode is None:
+            return []
+        return self.history.query(name, start=0, resolution=1)['mean']
 
-        # Plot scores
-        self.ax_score.plot(self.scores, alpha=0.6, label='Score')
-        self.ax_score.plot(self.avg_scores, label='Average Score')
-        self.ax_score.legend()
+    @property
+    def scores(self):
+        return self._raw('score')
+
+    @property
+    def losses(self):
+        return self._raw('loss')
+
+    @property
+    def avg_scores(self):
+        return self._raw('avg_score')
 
-        # Plot losses
-        if self.losses:
-            self.ax_loss.plot(self.losses, alpha=0.6)
+    @property
+    def epsilons(self):
+        return self._raw('epsilon')
 
-        # Plot steps
-        self.ax_steps.plot(self.steps, alpha=0.6)
+    @property
+    def steps(self):
+        return self._raw('steps')
 
-        # Plot rewards
-        self.ax_reward.plot(self.rewards, alpha=0.6)
+    @property
+    def rewards(self):
+        return self._raw('reward')
 
-        # Plot epsilon
-        self.ax_epsilon.plot(self.epsilons, alpha=0.6)
+    def update_plots(self, episode, action_dist=None):
+        from plot_results import lttb, refresh_figure
+
+        for line, name in ((self.score_line, 'score'),
+                           (self.avg_score_line, 'avg_score'),
+                           (self.loss_line, 'loss'),
+                           (self.steps_line, 'steps'),
+                           (self.reward_line, 'reward'),
+                           (self.epsilon_line, 'epsilon')):
+            # Найдрібніший рівень, що охоплює весь запуск, далі LTTB
+            series = self.history.query(name, start=0, max_points=self.history.capacity)
+            line.set_data(*lttb(series['episodes'], series['mean'], self.max_points))
 
         # Plot action distribution heatmap
         if action_dist is not None:
-            sns.heatmap(action_dist.reshape(1, -1),
-                        ax=self.ax_heatmap,
-                        cmap='YlOrRd',
-                        cbar=True)
-            self.ax_heatmap.set_xlabel('Action')
-
-        plt.pause(0.1)
+            data = action_dist.reshape(1, -1)
+            if self.heatmap is None:
+                self.heatmap = self.ax_heatmap.imshow(data, cmap='YlOrRd', aspect='auto')
+                self.fig.colorbar(self.heatmap, ax=self.ax_heatmap)
+                self.ax_heatmap.set_xlabel('Action')
+                self.ax_heatmap.set_yticks([])
+            else:
+                self.heatmap.set_data(data)
+            self.heatmap.set_clim(0, max(float(data.max()), 1e-9))
+
+        refresh_figure(self.fig, self.headless, self.output)
 
     def get_stats(self):
         return {
-            'avg_score': np.mean(self.scores_window),
-            'avg_loss': np.mean(self.losses_window) if self.losses_window else 0,
-            'avg_steps': np.mean(self.steps_window),
-            'avg_reward': np.mean(self.rewards_window),
+            'avg_score': self.scores_window.mean,
+            'avg_loss': self.losses_window.mean,
+            'avg_steps': self.steps_window.mean,
+            'avg_reward': self.rewards_window.mean,
             'training_time': time.time() - self.training_start
         }
 
 
 # Enhanced training function
-def enhanced_train(env, agent, episodes=500, render_every=50):
-    monitor = RLMonitor()
+def enhanced_train(env, agent, episodes=500, render_every=50,
+                   checkpoint_dir='checkpoints', checkpoint_every=50, resume=False,
+                   plot_every=1, headless=False):
+    monitor = RLMonitor(render_every=plot_every, headless=headless)
     action_distribution = np.zeros(env.action_space_n)
     best_score = float('-inf')
-
-    for episode in range(episodes):
-        state = env.reset()
-        total_reward = 0
-        episode_losses = []
-        episode_rewards = []
-        steps = 0
-
-        while True:
-            if episode % render_every == 0:
-                env.render()
-
-            # Get action and update distribution
-            action = agent.get_action(state)
-            action_distribution[action] += 1
-
-            next_state, reward, done, _, info = env.step(action)
-
-            # Store experience with N-step returns
-            agent.remember(state, action, reward, next_state, done)
-
-            # Train agent
-            loss = agent.train()
-            if loss is not None:
-                episode_losses.append(loss)
-
-            state = next_state
-            total_reward += reward
-            episode_rewards.append(reward)
-            steps += 1
-
-            if done:
-                break
-
-        # Update agent and monitoring
-        agent.update_epsilon()
-        avg_loss = np.mean(episode_losses) if episode_losses else None
-
-        # Update monitoring system
-        monitor.update(
-            episode=episode,
-            score=total_reward,
-            loss=avg_loss,
-            epsilon=agent.epsilon,
-            steps=steps,
-            rewards=episode_rewards,
-            action_dist=action_distribution / action_distribution.sum()
-        )
-
-        # Save best model
-        if total_reward > best_score:
-            best_score = total_reward
-            torch.save(agent.policy_net.state_dict(), 'best_model.pth')
-
-        # Print progress
-        if episode % 10 == 0:
-            stats = monitor.get_stats()
-            print(f"\nEpisode: {episode}")
-            print(f"Score: {total_reward:.2f}")
-            print(f"Average Score: {stats['avg_score']:.2f}")
-            print(f"Steps: {steps}")
-            print(f"Epsilon: {agent.epsilon:.3f}")
-            print(f"Training Time: {stats['training_time']:.2f}s")
+    first_episode = 0
+
+    # Продовжуємо з останнього чекпойнта, якщо він є
+    path = latest_checkpoint(checkpoint_dir) if resume else None
+    if path is not None:
+        resumed = load_checkpoint(path, agent)
+        first_episode = resumed['step'] + 1
+        best_score = resumed['extra']['best_score']
+        action_distribution = resumed['extra']['action_distribution']
+        print(f"Resumed from episode {resumed['step']}")
+
+    # Чекпойнти пишуться у фоновому потоці; best_model.pth - ваги найкращого
+    checkpoints = CheckpointManager(checkpoint_dir, best_weights='best_model.pth')
+
+    try:
+        for episode in range(first_episode, episodes):
+            state = env.reset()
+            total_reward = 0
+            episode_losses = []
+            episode_rewards = []
+            steps = 0
+
+            while True:
+                if episode % render_every == 0:
+                    env.render()
+
+                # Get action and update distribution
+                action = agent.get_action(state)
+                action_distribution[action] += 1
+
+                next_state, reward, done, _, info = env.step(action)
+
+                # Store experience with N-step returns
+                agent.remember(state, action, reward, next_state, done)
+
+                # Train agent
+                loss = agent.train()
+                if loss is not None:
+                    episode_losses.append(loss)
+
+                state = next_state
+                total_reward += reward
+                episode_rewards.append(reward)
+                steps += 1
+
+                if done:
+                    break
+
+            # Update agent and monitoring
+            agent.update_epsilon()
+            avg_loss = np.mean(episode_losses) if episode_losses else None
+
+            # Update monitoring system
+            monitor.update(
+                episode=episode,
+                score=total_reward,
+                loss=avg_loss,
+                epsilon=agent.epsilon,
+                steps=steps,
+                rewards=episode_rewards,
+                action_dist=action_distribution / action_distribution.sum()
+            )
+
+            # Save best model and periodic checkpoints
+            new_best = total_reward > best_score
+            best_score = max(best_score, total_reward)
+            if new_best or (episode + 1) % checkpoint_every == 0 or episode + 1 == episodes:
+                checkpoints.save(agent, episode, score=total_reward,
+                                 extra={'best_score': best_score,
+                                        'action_distribution': action_distribution.copy()})
+
+            # Print progress
+            if episode % 10 == 0:
+                stats = monitor.get_stats()
+                print(f"\nEpisode: {episode}")
+                print(f"Score: {total_reward:.2f}")
+                print(f"Average Score: {stats['avg_score']:.2f}")
+                print(f"Steps: {steps}")
+                print(f"Epsilon: {agent.epsilon:.3f}")
+                print(f"Training Time: {stats['training_time']:.2f}s")
+    finally:
+        checkpoints.close()
 
     env.close()
     return monitor.scores, monitor.losses
@@ -0,0 +1,148 @@
+# numpy_policy.py
+import json
+import struct
+import numpy as np
+from typing import Optional
+from environment import UINT8_SCALE, UINT8_OFFSET
+
+# Формат файлу: MAGIC, довжина JSON-заголовка (uint64 LE), заголовок, далі
+# float32-тензори, кожен вирівняний на ALIGN байт, тож файл можна
+# відобразити в пам'ять і ділити між процесами без копіювання
+MAGIC = b"SNETNP01"
+ALIGN = 64
+
+# Шари SimpleNet у порядку state_dict: conv.0, conv.2, conv.4, fc.0, fc.2
+CONV_LAYERS = ("conv.0", "conv.2", "conv.4")
+FC_LAYERS = ("fc.0", "fc.2")
+
+
+def _align(offset: int) -> int:
+    return (offset + ALIGN - 1) // ALIGN * ALIGN
+
+
+def export_policy(state_dict, path: str, state_shape) -> None:
+    """Записує ваги SimpleNet (модель або state_dict) у файл для NumpyPolicy.
+
+    Ваги одразу переставляються у розкладку рантайму: згортки як
+    (C_in, kh, kw, C_out), перший Linear - з входом у порядку (H, W, C),
+    щоб рантайм працював у NHWC без транспонувань.
+    """
+    if hasattr(state_dict, "state_dict"):
+        state_dict = state_dict.state_dict()
+    arrays = {name: value.detach().cpu().float().numpy() if hasattr(value, "detach") else np.asarray(value)
+              for name, value in state_dict.items()}
+
+    tensors = {}
+    for layer in CONV_LAYERS:
+        tensors[f"{layer}.weight"] = arrays[f"{layer}.weight"].transpose(1, 2, 3, 0)
+        tensors[f"{layer}.bias"] = arrays[f"{layer}.bias"]
+    _, height, width = state_shape
+    fc_weight = arrays["fc.0.weight"]
+    channels = fc_weight.shape[1] // (height * width)
+    tensors["fc.0.weight"] = (fc_weight.reshape(-1, channels, height, width)
+                              .transpose(2, 3, 1, 0).reshape(-1, fc_weight.shape[0]))
+    tensors["fc.0.bias"] = arrays["fc.0.bias"]
+    tensors["fc.2.weight"] = arrays["fc.2.weight"].T
+    tensors["fc.2.bias"] = arrays["fc.2.bias"]
+
+    header = {"state_shape": list(state_shape), "n_actions": int(arrays["fc.2.bias"].shape[0]),
+              "tensors": {}}
+    offset = 0
+    for name, value in tensors.items():
+        header["tensors"][name] = {"shape": list(value.shape), "offset": offset}
+        offset = _align(offset + value.size * 4)
+    header_bytes = json.dumps(header).encode()
+    data_start = _align(len(MAGIC) + 8 + len(header_bytes))
+
+    with open(path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<Q", len(header_bytes)))
+        f.write(header_bytes)
+        for name, value in tensors.items():
+            f.seek(data_start + header["tensors"][name]["offset"])
+            f.write(np.ascontiguousarray(value, dtype="<f4").tobytes())
+        f.truncate(data_start + offset)
+
+
+class NumpyPolicy:
+    """Прямий прохід SimpleNet на NumPy без імпорту torch.
+
+    Ваги читаються з файлу ``export_policy`` через np.memmap (процеси, що
+    відкривають той самий файл, ділять сторінки ваг). Згортки 3x3 з padding 1
+    обчислюються як im2col через sliding_window_view і одне tensordot на шар,
+    батчем по всіх спостереженнях.
+    """
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a NumpyPolicy weights file")
+            header_len, = struct.unpack("<Q", f.read(8))
+            header = json.loads(f.read(header_len))
+        data_start = _align(len(MAGIC) + 8 + header_len)
+
+        self.state_shape = tuple(header["state_shape"])
+        self.n_actions = header["n_actions"]
+        self._data = np.memmap(path, dtype=np.uint8, mode="r")
+        self.weights = {}
+        for name, meta in header["tensors"].items():
+            count = int(np.prod(meta["shape"]))
+            start = data_start + meta["offset"]
+            self.weights[name] = (self._data[start:start + count * 4]
+                                  .view("<f4").reshape(meta["shape"]))
+
+    def _prepare(self, states: np.ndarray) -> np.ndarray:
+        states = np.asarray(states)
+        if states.ndim == 3:
+            states = states[None]
+        if states.dtype == np.uint8:
+            channels = states.shape[1]
+            states = (states * UINT8_SCALE[:channels, None, None] +
+                      UINT8_OFFSET[:channels, None, None])
+        # NCHW -> NHWC
+        return states.astype(np.float32, copy=False).transpose(0, 2, 3, 1)
+
+    @staticmethod
+    def _conv3x3(x: np.ndarray, weight: np.ndarray, bias: np.ndarray) -> np.ndarray:
+        padded = np.pad(x, ((0, 0), (1, 1), (1, 1), (0, 0)))
+        # (B, H, W, C, 3, 3) подання без копіювання
+        patches = np.lib.stride_tricks.sliding_window_view(padded, (3, 3), axis=(1, 2))
+        out = np.tensordot(patches, weight, axes=([3, 4, 5], [0, 1, 2]))
+        out += bias
+        return np.maximum(out, 0, out=out)
+
+    def __call__(self, states: np.ndarray) -> np.ndarray:
+        """Q-значення (B, n_actions) для станів (B, C, H, W) або (C, H, W)"""
+        w = self.weights
+        x = self._prepare(states)
+        for layer in CONV_LAYERS:
+            x = self._conv3x3(x, w[f"{layer}.weight"], w[f"{layer}.bias"])
+        x = x.reshape(len(x), -1) @ w["fc.0.weight"]
+        x += w["fc.0.bias"]
+        np.maximum(x, 0, out=x)
+        return x @ w["fc.2.weight"] + w["fc.2.bias"]
+
+    def act(self, states: np.ndarray, epsilon: float = 0.0,
+            rng: Optional[np.random.Generator] = None) -> np.ndarray:
+        """epsilon-greedy дії для батча станів"""
+        q_values = self(states)
+        actions = q_values.argmax(axis=1)
+        if epsilon > 0:
+            rng = rng or np.random.default_rng()
+            explore = rng.random(len(actions)) < epsilon
+            actions[explore] = rng.integers(0, self.n_actions, int(explore.sum()))
+        return actions
+
+
+if __name__ == "__main__":
+    import argparse
+    import torch
+
+    parser = argparse.ArgumentParser(description="Export SimpleNet weights for NumpyPolicy")
+    parser.add_argument('checkpoint', help="state_dict, e.g. best_model.pth")
+    parser.add_argument('output')
+    parser.add_argument('--size', type=int, default=6)
+    args = parser.parse_args()
+
+    export_policy(torch.load(args.checkpoint, map_location='cpu'), args.output, (7, args.size, args.size))
+    print(f"Exported {args.checkpoint} -> {args.output}")
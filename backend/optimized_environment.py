@@ -4,8 +4,8 @@ from environment import EnhancedGameEnv
 
 
 class SimplifiedGameEnv(EnhancedGameEnv):
-    def __init__(self, size: int = 6, n_coins: int = 1, n_obstacles: int = 2):
-        super().__init__(size, n_coins, n_obstacles, dynamic_obstacles=False)
+    def __init__(self, size: int = 6, n_coins: int = 1, n_obstacles: int = 2, **kwargs):
+        super().__init__(size, n_coins, n_obstacles, dynamic_obstacles=False, **kwargs)
         self.prev_coin_distance = None
         self.steps_without_improvement = 0
         self.max_steps = size * size  # Зменшуємо максимальну кількість кроків
@@ -35,13 +35,13 @@ class SimplifiedGameEnv(EnhancedGameEnv):
         # Додаємо нормалізований вектор напрямку до монети
         direction = self._get_normalized_direction_to_coin()
 
-        # Створюємо спрощений стан
-        state = np.zeros((7, self.size, self.size))
-        state[0:5] = self.grid  # Оригінальні канали
+        # Створюємо спрощений стан у попередньо виділеному буфері
+        state = self._next_obs_buffer((7, self.size, self.size))
+        state[0:5] = self.grid[0:5]  # Оригінальні канали
 
         # Додаємо канали з напрямком до монети
-        state[5].fill(direction[0])
-        state[6].fill(direction[1])
+        state[5].fill(self._encode(5, direction[0]))
+        state[6].fill(self._encode(6, direction[1]))
 
         return state
 
@@ -89,14 +89,18 @@ class SimplifiedGameEnv(EnhancedGameEnv):
 
 
 class MultiCoinGameEnv(EnhancedGameEnv):
-    def __init__(self, size: int = 6, n_coins: int = 3, n_obstacles: int = 2):
+    def __init__(self, size: int = 6, n_coins: int = 3, n_obstacles: int = 2, **kwargs):
+        # Сумарні напрямки до монет виходять за [-1, 1], тому uint8-квантування не підходить
+        if np.dtype(kwargs.get('obs_dtype', np.float64)) == np.uint8:
+            raise ValueError("MultiCoinGameEnv does not support obs_dtype=uint8")
+
         # Ініціалізуємо власні змінні перед викликом батьківського конструктора
         self.initial_coins = n_coins
         self.prev_coin_distances = None
         self.steps_without_coin = 0
 
         # Викликаємо батьківський конструктор
-        super().__init__(size, n_coins, n_obstacles, dynamic_obstacles=False)
+        super().__init__(size, n_coins, n_obstacles, dynamic_obstacles=False, **kwargs)
 
         # Встановлюємо максимальну кількість кроків
         self.max_steps = size * size * n_coins
@@ -104,25 +108,18 @@ class MultiCoinGameEnv(EnhancedGameEnv):
     def _get_all_coin_distances(self):
         if not self.coins:
             return [0]
-        distances = []
-        for coin in self.coins:
-            dist = abs(self.agent_pos[0] - coin[0]) + abs(self.agent_pos[1] - coin[1])
-            distances.append(dist)
-        return distances
+        coins = np.asarray(self.coins)
+        return (np.abs(coins - self.agent_pos).sum(axis=1)).tolist()
 
     def _get_coin_directions(self):
         if not self.coins:
             return np.zeros((self.size, self.size, 2))
 
-        directions = np.zeros((self.size, self.size, 2))
-        for coin in self.coins:
-            dx = coin[0] - self.agent_pos[0]
-            dy = coin[1] - self.agent_pos[1]
-            dist = max(abs(dx), abs(dy), 1)
-            directions[:, :, 0] += dx / dist
-            directions[:, :, 1] += dy / dist
-
-        return directions
+        # Сума нормованих напрямків до всіх монет однакова для кожної клітинки
+        delta = np.asarray(self.coins) - self.agent_pos
+        dist = np.maximum(np.abs(delta).max(axis=1, keepdims=True), 1)
+        direction = (delta / dist).sum(axis=0)
+        return np.broadcast_to(direction, (self.size, self.size, 2))
 
     def reset(self):
         _ = super().reset()
@@ -132,8 +129,8 @@ class MultiCoinGameEnv(EnhancedGameEnv):
 
     def _get_enhanced_state(self):
         # Базовий стан
-        state = np.zeros((8, self.size, self.size))
-        state[0:5] = self.grid
+        state = self._next_obs_buffer((8, self.size, self.size))
+        state[0:5] = self.grid[0:5]
 
         # Додаємо інформацію про напрямки до монет
         directions = self._get_coin_directions()
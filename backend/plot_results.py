@@ -2,8 +2,7 @@
 
 import numpy as np
 import matplotlib.pyplot as plt
-from matplotlib.ticker import MaxNLocator
-import seaborn as sns
+from collections import deque
 
 
 def plot_results(scores, losses, window=10):
@@ -15,6 +14,8 @@ def plot_results(scores, losses, window=10):
         losses: список значень функції втрат
         window: розмір вікна для згладжування
     """
+    import seaborn as sns
+
     # Створюємо вікно з графіками
     plt.figure(figsize=(15, 10))
 
@@ -71,11 +72,92 @@ def plot_results(scores, losses, window=10):
     plt.close()
 
 
+class RunningMean:
+    """Ковзне середнє останніх ``window`` значень за O(1) на значення"""
+
+    def __init__(self, window):
+        self.values = deque(maxlen=window)
+        self.total = 0.0
+
+    def append(self, value):
+        if len(self.values) == self.values.maxlen:
+            self.total -= self.values[0]
+        self.values.append(value)
+        self.total += value
+        return self.mean
+
+    @property
+    def mean(self):
+        return self.total / len(self.values) if self.values else 0.0
+
+
+def trailing_mean(values, window):
+    """Середнє останніх window значень для кожної точки, O(n) через кумулятивну суму"""
+    values = np.asarray(values, dtype=np.float64)
+    cumsum = np.concatenate(([0.0], np.cumsum(values)))
+    end = np.arange(1, len(values) + 1)
+    start = np.maximum(0, end - window)
+    return (cumsum[end] - cumsum[start]) / (end - start)
+
+
+def lttb(x, y, n_out):
+    """Largest-Triangle-Three-Buckets: n_out точок, що зберігають форму кривої.
+
+    Перша й остання точки лишаються; з кожного з n_out - 2 кошиків
+    вибирається точка, що утворює найбільший трикутник з попередньою
+    вибраною і середнім наступного кошика.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    if n <= n_out or n_out < 3:
+        return x, y
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for k in range(n_out - 2):
+        start, end = edges[k], edges[k + 1]
+        next_end = edges[k + 2] if k + 2 < len(edges) else n
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) -
+                      (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(area.argmax())
+        selected[k + 1] = a
+    return x[selected], y[selected]
+
+
+def create_figure(figsize, headless=False):
+    """Фігура для живих графіків; headless - без вікна, лише для запису у файл"""
+    if headless:
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        fig = Figure(figsize=figsize)
+        FigureCanvasAgg(fig)
+        return fig
+    plt.ion()  # Включаємо інтерактивний режим
+    return plt.figure(figsize=figsize)
+
+
+def refresh_figure(fig, headless=False, output=None):
+    """Перемальовує фігуру без блокувань (замість plt.pause) або пише її у файл"""
+    for ax in fig.axes:
+        ax.relim()
+        ax.autoscale_view()
+    if headless:
+        fig.savefig(output)
+    else:
+        fig.canvas.draw_idle()
+        fig.canvas.flush_events()
+
+
 # Додаємо функцію для живого оновлення графіків
-def create_live_plot():
+def create_live_plot(headless=False):
     """Створює живий графік для відображення процесу навчання"""
-    plt.ion()  # Включаємо інтерактивний режим
-    fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(10, 8))
+    fig = create_figure((10, 8), headless)
+    ax1, ax2 = fig.subplots(2, 1)
 
     line1, = ax1.plot([], [], 'b-', label='Score')
     line2, = ax1.plot([], [], 'r-', label='Average Score')
@@ -92,31 +174,82 @@ def create_live_plot():
     ax2.grid(True)
     ax2.legend()
 
-    plt.tight_layout()
+    fig.tight_layout()
     return fig, (line1, line2, line3)
 
 
-def update_live_plot(fig, lines, scores, losses, window=100):
-    """Оновлює живий графік"""
+def update_live_plot(fig, lines, scores, losses, window=100, max_points=2000):
+    """Оновлює живий графік за повною історією (O(n) на виклик).
+
+    Для оновлення після кожного епізоду краще LivePlot: він рахує
+    середнє інкрементально.
+    """
     line1, line2, line3 = lines
-    episodes = list(range(len(scores)))
+    episodes = np.arange(len(scores))
 
     # Оновлюємо графік оцінок
-    line1.set_data(episodes, scores)
+    line1.set_data(*lttb(episodes, scores, max_points))
 
     # Оновлюємо графік середніх оцінок
     if len(scores) >= window:
-        avg_scores = [np.mean(scores[max(0, i - window):i]) for i in range(1, len(scores) + 1)]
-        line2.set_data(episodes, avg_scores)
+        line2.set_data(*lttb(episodes, trailing_mean(scores, window), max_points))
 
     # Оновлюємо графік втрат
     if losses:
-        line3.set_data(range(len(losses)), losses)
+        line3.set_data(*lttb(np.arange(len(losses)), losses, max_points))
 
-    # Оновлюємо межі осей
-    for ax in fig.axes:
-        ax.relim()
-        ax.autoscale_view()
+    refresh_figure(fig)
+
+
+class LivePlot:
+    """Живий графік оцінок і втрат з оновленням ліній на місці.
+
+    Середнє рахується інкрементально (RunningMean), а довга історія перед
+    показом проріджується LTTB до ``max_points`` точок, тож вартість
+    рендерингу не росте з кількістю епізодів. Рендеринг - кожні
+    ``render_every`` епізодів; ``headless`` пише графік у ``output``
+    замість вікна.
+    """
 
-    fig.canvas.draw()
-    fig.canvas.flush_events()
\ No newline at end of file
+    def __init__(self, window=100, max_points=2000, render_every=1, headless=False,
+                 output='training_progress.png'):
+        self.window = window
+        self.max_points = max_points
+        self.render_every = render_every
+        self.headless = headless
+        self.output = output
+        self.fig, self.lines = create_live_plot(headless)
+        self.scores = []
+        self.avg_scores = []
+        self.losses = []
+        self._avg = RunningMean(window)
+
+    def update(self, score, loss=None, render=True):
+        self.scores.append(score)
+        self.avg_scores.append(self._avg.append(score))
+        if loss is not None:
+            self.losses.append(loss)
+        if render and len(self.scores) % self.render_every == 0:
+            self.render()
+
+    def extend(self, scores, losses):
+        """Історія попереднього запуску (продовження з чекпойнта) без рендерингу"""
+        for score in scores:
+            self.update(score, render=False)
+        self.losses.extend(losses)
+
+    def render(self):
+        line1, line2, line3 = self.lines
+        episodes = np.arange(len(self.scores))
+        line1.set_data(*lttb(episodes, self.scores, self.max_points))
+        if len(self.scores) >= self.window:
+            line2.set_data(*lttb(episodes, self.avg_scores, self.max_points))
+        if self.losses:
+            line3.set_data(*lttb(np.arange(len(self.losses)), self.losses, self.max_points))
+        refresh_figure(self.fig, self.headless, self.output)
+
+    def close(self):
+        if self.headless:
+            refresh_figure(self.fig, True, self.output)
+        else:
+            plt.close(self.fig)
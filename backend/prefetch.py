@@ -0,0 +1,100 @@
+# prefetch.py
+import queue
+import threading
+import time
+import numpy as np
+import torch
+from utils import DEVICE
+
+
+class PrefetchSampler:
+    """Фонова підготовка батчів з replay-пам'яті.
+
+    Потік заздалегідь збирає до ``depth`` батчів у кільце багаторазових
+    тензорів (закріплених у пам'яті, якщо є CUDA), тож ``get`` лише забирає
+    готовий батч з черги. Кільце має depth + 2 слоти: depth у черзі, один у
+    навчанні і один, що заповнюється, тому слот не перезаписується, поки
+    батч з нього використовується. Для ReplayBuffer пріоритети вибраних
+    переходів відстають від навчання щонайбільше на depth батчів.
+
+    ``starved`` рахує виклики ``get``, яким довелося чекати на батч.
+    """
+
+    def __init__(self, memory, batch_size: int, depth: int = 2):
+        self.memory = memory
+        self.batch_size = batch_size
+        self.depth = depth
+        self.pin_memory = torch.cuda.is_available()
+        self._queue = queue.Queue(maxsize=depth)
+        self._stop = threading.Event()
+        self._slots = None
+        self._next_slot = 0
+
+        self.batches = 0
+        self.starved = 0
+        self.wait_time = 0.0
+
+        self._thread = threading.Thread(target=self._run, name="prefetch-sampler", daemon=True)
+        self._thread.start()
+
+    def _allocate(self) -> None:
+        shape = self.memory.observations.shape[1:]
+        obs_dtype = torch.from_numpy(np.zeros(0, dtype=self.memory.obs_dtype)).dtype
+        self._slots = []
+        for _ in range(self.depth + 2):
+            tensors = (
+                torch.empty((self.batch_size, *shape), dtype=obs_dtype, pin_memory=self.pin_memory),
+                torch.empty(self.batch_size, dtype=torch.int64, pin_memory=self.pin_memory),
+                torch.empty(self.batch_size, dtype=torch.float32, pin_memory=self.pin_memory),
+                torch.empty((self.batch_size, *shape), dtype=obs_dtype, pin_memory=self.pin_memory),
+                torch.empty(self.batch_size, dtype=torch.float32, pin_memory=self.pin_memory),
+            )
+            # NumPy-подання тих самих буферів для gather(out=...)
+            self._slots.append((tensors, tuple(t.numpy() for t in tensors)))
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            if len(self.memory) < self.batch_size:
+                self._stop.wait(0.001)
+                continue
+            if self._slots is None:
+                self._allocate()
+
+            tensors, arrays = self._slots[self._next_slot]
+            self._next_slot = (self._next_slot + 1) % len(self._slots)
+            batch = self.memory.sample(self.batch_size, out=arrays)
+            # Для ReplayBuffer додаються indices і weights
+            item = (*tensors, *batch[5:])
+
+            while not self._stop.is_set():
+                try:
+                    self._queue.put(item, timeout=0.1)
+                    break
+                except queue.Full:
+                    continue
+
+    def get(self):
+        """Наступний батч (states, actions, rewards, next_states, dones[, indices, weights])"""
+        try:
+            batch = self._queue.get_nowait()
+        except queue.Empty:
+            self.starved += 1
+            start = time.perf_counter()
+            batch = self._queue.get()
+            self.wait_time += time.perf_counter() - start
+        self.batches += 1
+        tensors = tuple(t.to(DEVICE, non_blocking=True) for t in batch[:5])
+        return (*tensors, *batch[5:])
+
+    def stats(self) -> dict:
+        return {
+            'batches': self.batches,
+            'starved': self.starved,
+            'starvation_rate': self.starved / max(1, self.batches),
+            'wait_time': self.wait_time,
+            'queued': self._queue.qsize()
+        }
+
+    def close(self) -> None:
+        self._stop.set()
+        self._thread.join(timeout=1.0)
@@ -0,0 +1,70 @@
+# quantization.py
+import copy
+import warnings
+import torch
+import torch.nn as nn
+
+
+class QuantizedPolicy:
+    """int8-копія SimpleNet для вибору дій на CPU.
+
+    Linear-шари квантуються динамічно (ваги int8, активації квантуються на
+    льоту), тож Linear(conv_out_size, 512), що росте з size², займає вчетверо
+    менше пам'яті. З ``static_convs=True`` згортки також квантуються статично
+    (FX graph mode) з калібруванням на станах, переданих у ``refresh``.
+    Копія не оновлюється сама: ``refresh`` перебудовує її з fp32-ваг learner.
+    """
+
+    def __init__(self, net: nn.Module, static_convs: bool = False, calibration=None):
+        self.static_convs = static_convs
+        self.model = None
+        self.version = 0
+        self.agreement = None
+        self.refresh(net, calibration)
+
+    def refresh(self, net: nn.Module, calibration=None) -> None:
+        # Копія на CPU у звичайному форматі пам'яті, навчальна мережа не змінюється
+        fp32 = copy.deepcopy(net).cpu().float().to(memory_format=torch.contiguous_format).eval()
+        with warnings.catch_warnings():
+            # torch.ao.quantization позначений як deprecated на користь torchao
+            warnings.simplefilter("ignore")
+            if self.static_convs and calibration is not None:
+                self.model = self._quantize_static(fp32, calibration)
+            else:
+                self.model = torch.ao.quantization.quantize_dynamic(fp32, {nn.Linear}, dtype=torch.qint8)
+        self.version += 1
+
+    @staticmethod
+    def _quantize_static(fp32: nn.Module, calibration: torch.Tensor) -> nn.Module:
+        from torch.ao.quantization import get_default_qconfig_mapping
+        from torch.ao.quantization.quantize_fx import prepare_fx, convert_fx
+
+        calibration = torch.as_tensor(calibration, dtype=torch.float32)
+        prepared = prepare_fx(fp32, get_default_qconfig_mapping('x86'), (calibration[:1],))
+        with torch.inference_mode():
+            prepared(calibration)
+        return convert_fx(prepared)
+
+    def __call__(self, states: torch.Tensor) -> torch.Tensor:
+        with torch.inference_mode():
+            return self.model(states.cpu())
+
+    def measure_agreement(self, net: nn.Module, states: torch.Tensor) -> float:
+        """Частка станів, для яких argmax int8-копії збігається з fp32"""
+        with torch.inference_mode():
+            reference = net(states).argmax(1).cpu()
+            quantized = self(states).argmax(1)
+        self.agreement = float((reference == quantized).float().mean())
+        return self.agreement
+
+
+def model_nbytes(module: nn.Module) -> int:
+    """Розмір ваг (включно з пакованими int8-вагами) у байтах"""
+    total = 0
+    for value in module.state_dict().values():
+        if isinstance(value, torch.Tensor):
+            total += value.numel() * value.element_size()
+        elif isinstance(value, tuple):
+            # Пакований Linear зберігає (weight, bias)
+            total += sum(v.numel() * v.element_size() for v in value if isinstance(v, torch.Tensor))
+    return total
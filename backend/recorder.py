@@ -0,0 +1,192 @@
+# recorder.py
+import argparse
+import glob
+import logging
+import os
+import queue
+import threading
+from typing import Iterator, Optional, Tuple
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Колонки кожного чанка, у порядку повернення батчів (як у ReplayMemory.sample)
+COLUMNS = ('states', 'actions', 'rewards', 'next_states', 'dones')
+
+
+class EpisodeRecorder:
+    """Потоковий запис переходів у стиснені колонкові чанки.
+
+    ``record`` лише копіює перехід у поточний буфер чанка; заповнений
+    буфер передається фоновому потоку, який пише його через
+    ``np.savez_compressed`` у ``chunk-000000.npz`` (тимчасовий файл і
+    os.replace, тож читач бачить лише цілі чанки). Крок тренування чекає
+    лише тоді, коли в черзі вже ``max_pending`` незаписаних чанків.
+    Спостереження uint8 зберігаються як є, решта - у float32.
+    """
+
+    def __init__(self, directory: str, chunk_size: int = 4096, max_pending: int = 4):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.chunk_size = chunk_size
+        # Нумерація чанків і епізодів продовжує наявний запис (після перезапуску)
+        existing = sorted(glob.glob(os.path.join(directory, 'chunk-*.npz')))
+        self.n_chunks = len(existing)
+        self.episode = 0
+        if existing:
+            with np.load(existing[-1]) as chunk:
+                self.episode = int(chunk['episodes'].max()) + 1
+        self.recorded = 0
+        self.error = None
+        self._buffers = None
+        self._n = 0
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._thread = threading.Thread(target=self._writer, name='episode-recorder', daemon=True)
+        self._thread.start()
+
+    def _allocate(self, state: np.ndarray) -> dict:
+        obs_dtype = np.uint8 if state.dtype == np.uint8 else np.float32
+        n = self.chunk_size
+        return {
+            'states': np.empty((n, *state.shape), dtype=obs_dtype),
+            'actions': np.empty(n, dtype=np.int64),
+            'rewards': np.empty(n, dtype=np.float32),
+            'next_states': np.empty((n, *state.shape), dtype=obs_dtype),
+            'dones': np.empty(n, dtype=np.float32),
+            'episodes': np.empty(n, dtype=np.int64)
+        }
+
+    def record(self, state, action, reward, next_state, done) -> None:
+        if self._buffers is None:
+            self._check_error()
+            self._buffers = self._allocate(np.asarray(state))
+        buffers, n = self._buffers, self._n
+        buffers['states'][n] = state
+        buffers['actions'][n] = action
+        buffers['rewards'][n] = reward
+        buffers['next_states'][n] = next_state
+        buffers['dones'][n] = done
+        buffers['episodes'][n] = self.episode
+        self._n += 1
+        self.recorded += 1
+        if done:
+            self.episode += 1
+        if self._n == self.chunk_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Передає неповний поточний чанк на запис"""
+        if not self._n:
+            return
+        self._check_error()
+        chunk = {name: column[:self._n] for name, column in self._buffers.items()}
+        self._queue.put((self.n_chunks, chunk))
+        self.n_chunks += 1
+        self._buffers = None
+        self._n = 0
+
+    def close(self) -> None:
+        self.flush()
+        self._queue.put(None)
+        self._thread.join()
+        self._check_error()
+
+    def _check_error(self) -> None:
+        if self.error is not None:
+            raise RuntimeError(f"Episode recorder failed: {self.error!r}") from self.error
+
+    def _writer(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            if self.error is not None:
+                continue
+            index, chunk = item
+            path = os.path.join(self.directory, f'chunk-{index:06d}.npz')
+            tmp = path + '.tmp'
+            try:
+                with open(tmp, 'wb') as f:
+                    np.savez_compressed(f, **chunk)
+                os.replace(tmp, path)
+            except Exception as e:
+                logger.exception("Failed to write %s", path)
+                self.error = e
+
+
+class OfflineDataset:
+    """Перемішані батчі з чанків EpisodeRecorder без завантаження всього набору.
+
+    Чанки читаються у випадковому порядку вікнами по ``shuffle_chunks``;
+    переходи вікна (разом із залишком попереднього) перемішуються й
+    віддаються батчами ``(states, actions, rewards, next_states, dones)`` -
+    у форматі ``SimplifiedAgent.train_on_batch``. У пам'яті одночасно не
+    більше ``shuffle_chunks + 1`` чанків.
+    """
+
+    def __init__(self, directory: str, batch_size: int = 32, shuffle_chunks: int = 4,
+                 seed: Optional[int] = None, drop_last: bool = True):
+        self.files = sorted(glob.glob(os.path.join(directory, 'chunk-*.npz')))
+        if not self.files:
+            raise ValueError(f"No recorded chunks in {directory}")
+        self.batch_size = batch_size
+        self.shuffle_chunks = shuffle_chunks
+        self.drop_last = drop_last
+        self.rng = np.random.default_rng(seed)
+
+    @staticmethod
+    def load_chunk(path: str) -> Tuple[np.ndarray, ...]:
+        with np.load(path) as chunk:
+            return tuple(chunk[name] for name in COLUMNS)
+
+    def __iter__(self) -> Iterator[Tuple[np.ndarray, ...]]:
+        # Кожна епоха - новий порядок чанків і переходів
+        order = self.rng.permutation(len(self.files))
+        rest = None
+        for start in range(0, len(order), self.shuffle_chunks):
+            window = [self.load_chunk(self.files[k]) for k in order[start:start + self.shuffle_chunks]]
+            if rest is not None:
+                window.append(rest)
+            columns = [np.concatenate(parts) for parts in zip(*window)]
+            idx = self.rng.permutation(len(columns[0]))
+            n_full = len(idx) // self.batch_size * self.batch_size
+            for k in range(0, n_full, self.batch_size):
+                batch = idx[k:k + self.batch_size]
+                yield tuple(column[batch] for column in columns)
+            # Неповний батч переходить у наступне вікно
+            rest = tuple(column[idx[n_full:]] for column in columns)
+        if rest is not None and len(rest[0]) and not self.drop_last:
+            yield rest
+
+
+def pretrain(agent, dataset: OfflineDataset, epochs: int = 1, log_every: int = 100) -> list:
+    """Офлайн-тренування агента на записаних переходах; повертає втрати"""
+    losses = []
+    for epoch in range(epochs):
+        for batch in dataset:
+            losses.append(agent.train_on_batch(*batch))
+            if log_every and len(losses) % log_every == 0:
+                logger.info(f"Epoch {epoch}, step {len(losses)}, loss {np.mean(losses[-log_every:]):.4f}")
+    return losses
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pretrain a policy on recorded transitions")
+    parser.add_argument('data', help="директорія з chunk-*.npz")
+    parser.add_argument('--epochs', type=int, default=1)
+    parser.add_argument('--batch-size', type=int, default=64)
+    parser.add_argument('--shuffle-chunks', type=int, default=4)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--output', default='pretrained_model.pth')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    import torch
+    from agent import SimplifiedAgent
+
+    dataset = OfflineDataset(args.data, args.batch_size, args.shuffle_chunks, args.seed)
+    state_shape = OfflineDataset.load_chunk(dataset.files[0])[0].shape[1:]
+    agent = SimplifiedAgent(state_shape, 8)
+    losses = pretrain(agent, dataset, args.epochs)
+    torch.save(agent.policy_net.state_dict(), args.output)
+    print(f"{len(losses)} batches, final loss {np.mean(losses[-100:]):.4f}, saved to {args.output}")
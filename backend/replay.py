@@ -0,0 +1,438 @@
+# replay.py
+import json
+import operator
+import os
+import threading
+import numpy as np
+from typing import Optional, Tuple
+
+
+class ReplayMemory:
+    """Кільцевий буфер досвіду на попередньо виділених неперервних масивах.
+
+    Кожне спостереження зберігається один раз: ``next_state`` переходу у
+    слоті ``i`` лежить у слоті ``i + 1``, а слот ``pos`` містить next_state
+    останнього переходу (тому слотів capacity + 1). Якщо наступний ``push``
+    починається не з попереднього next_state (кілька середовищ пишуть в одну
+    пам'ять), цей слот лишається недійсним як перехід і лише зберігає
+    next_state; такі слоти ніколи не потрапляють у вибірку. Після термінального
+    переходу next_state не використовується (множиться на 1 - done), тож його
+    слот просто перезаписується. Масиви виділяються при першому ``push``,
+    коли відома форма стану.
+    """
+
+    # Масиви, що зберігаються в чекпойнті
+    _ARRAYS = ('observations', 'actions', 'rewards', 'dones', 'valid')
+
+    def __init__(self, capacity: int, obs_dtype=None):
+        self.capacity = capacity
+        # None: uint8-спостереження зберігаються як є, решта - у float32
+        self.obs_dtype = np.dtype(obs_dtype) if obs_dtype is not None else None
+        self._slots = capacity + 1
+        self.pos = 0
+        self.filled = 0
+        self.size = 0
+        self._last_next_state = None
+        self._last_done = True
+        self.observations = None
+        self.actions = None
+        self.rewards = None
+        self.dones = None
+        self.valid = None
+        # Захищає буфер, коли вибірку робить фоновий потік (PrefetchSampler)
+        self.lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self.size
+
+    def _allocate(self, state: np.ndarray) -> None:
+        if self.obs_dtype is None:
+            self.obs_dtype = np.dtype(np.uint8) if state.dtype == np.uint8 else np.dtype(np.float32)
+        self.observations = self._new_array('observations', (self._slots, *state.shape), self.obs_dtype)
+        self.actions = self._new_array('actions', (self._slots,), np.int64)
+        self.rewards = self._new_array('rewards', (self._slots,), np.float32)
+        self.dones = self._new_array('dones', (self._slots,), np.float32)
+        self.valid = self._new_array('valid', (self._slots,), bool)
+
+    def _new_array(self, name: str, shape: tuple, dtype) -> np.ndarray:
+        return np.zeros(shape, dtype=dtype)
+
+    @property
+    def nbytes(self) -> int:
+        if self.observations is None:
+            return 0
+        return (self.observations.nbytes + self.actions.nbytes + self.rewards.nbytes +
+                self.dones.nbytes + self.valid.nbytes)
+
+    def state_dict(self) -> dict:
+        """Копія вмісту пам'яті для чекпойнта"""
+        with self.lock:
+            state = {'capacity': self.capacity, 'pos': self.pos, 'filled': self.filled,
+                     'size': self.size, 'last_done': self._last_done,
+                     'obs_dtype': None if self.obs_dtype is None else self.obs_dtype.str}
+            for name in self._ARRAYS:
+                array = getattr(self, name)
+                state[name] = None if array is None else array.copy()
+            return state
+
+    def load_state_dict(self, state: dict) -> None:
+        if state['capacity'] != self.capacity:
+            raise ValueError(f"Checkpoint memory capacity {state['capacity']} != {self.capacity}")
+        with self.lock:
+            self.pos, self.filled, self.size = state['pos'], state['filled'], state['size']
+            self.obs_dtype = None if state['obs_dtype'] is None else np.dtype(state['obs_dtype'])
+            for name in self._ARRAYS:
+                setattr(self, name, state[name])
+            # Наступний push перевіряє розрив ланцюжка через array_equal
+            self._last_next_state = None
+            self._last_done = state['last_done']
+
+    def _advance(self, valid: bool) -> None:
+        # Слот pos входить у вікно, а при заповненому буфері найстаріший слот
+        # (новий pos) з нього виходить
+        self.valid[self.pos] = valid
+        self.size += valid
+        self.pos = (self.pos + 1) % self._slots
+        if self.filled == self.capacity:
+            self.size -= int(self.valid[self.pos])
+            self.valid[self.pos] = False
+        else:
+            self.filled += 1
+
+    def push(self, state, action, reward, next_state, done) -> int:
+        with self.lock:
+            return self._push(state, action, reward, next_state, done)
+
+    def _push(self, state, action, reward, next_state, done) -> int:
+        state = np.asarray(state)
+        if self.observations is None:
+            self._allocate(state)
+
+        # Розрив ланцюжка: слот pos зберігає next_state попереднього переходу
+        if (not self._last_done and state is not self._last_next_state and
+                not np.array_equal(self.observations[self.pos], state)):
+            self._advance(False)
+
+        slot = self.pos
+        self.observations[slot] = state
+        self.actions[slot] = action
+        self.rewards[slot] = reward
+        self.dones[slot] = done
+        self._advance(True)
+        self.observations[self.pos] = next_state
+
+        self._last_next_state = next_state
+        self._last_done = bool(done)
+        return slot
+
+    def _window_slots(self, offsets: np.ndarray) -> np.ndarray:
+        # Зміщення від найстарішого слота вікна -> індекси слотів
+        start = (self.pos - self.filled) % self._slots
+        return (start + offsets) % self._slots
+
+    def sample_slots(self, batch_size: int) -> np.ndarray:
+        idx = self._window_slots(np.random.randint(0, self.filled, size=batch_size))
+        # Недійсні слоти (розриви ланцюжка) перевибираються
+        invalid = ~self.valid[idx]
+        while invalid.any():
+            idx[invalid] = self._window_slots(np.random.randint(0, self.filled, size=int(invalid.sum())))
+            invalid = ~self.valid[idx]
+        return idx
+
+    def sample(self, batch_size: int, out: Optional[Tuple[np.ndarray, ...]] = None):
+        with self.lock:
+            return self.gather(self.sample_slots(batch_size), out)
+
+    def gather(self, idx: np.ndarray, out: Optional[Tuple[np.ndarray, ...]] = None):
+        """Повертає (states, actions, rewards, next_states, dones) для слотів idx.
+
+        Якщо передано out - п'ять масивів відповідних форм, дані збираються
+        в них без нових виділень пам'яті.
+        """
+        next_idx = (idx + 1) % self._slots
+        if out is None:
+            return (self.observations[idx], self.actions[idx], self.rewards[idx],
+                    self.observations[next_idx], self.dones[idx])
+
+        states, actions, rewards, next_states, dones = out
+        np.take(self.observations, idx, axis=0, out=states)
+        np.take(self.actions, idx, out=actions)
+        np.take(self.rewards, idx, out=rewards)
+        np.take(self.observations, next_idx, axis=0, out=next_states)
+        np.take(self.dones, idx, out=dones)
+        return out
+
+
+
+class MemmapReplayMemory(ReplayMemory):
+    """ReplayMemory, чиї масиви - np.memmap-файли в ``directory``.
+
+    Кожне поле лежить в окремому .npy-файлі (розріджений файл повного
+    розміру створюється при першому push), тож розмір буфера обмежує диск, а
+    не RAM: запис іде в кінець кільця, а вибірка за випадковими індексами
+    читає сторінки через page cache ОС. Лічильники кільця зберігаються в
+    memory.json; якщо він є, буфер відкривається з диска миттєво, без
+    повторного заповнення.
+
+    Дані скидаються на диск кожні ``flush_every`` push-ів і в ``close``.
+    Після аварійного завершення (заголовок без позначки clean) слоти, які
+    могли змінитися після останнього flush, позначаються недійсними.
+    """
+
+    HEADER = 'memory.json'
+
+    def __init__(self, capacity: int, directory: str, obs_dtype=None, flush_every: Optional[int] = None):
+        super().__init__(capacity, obs_dtype=obs_dtype)
+        self.directory = directory
+        # За замовчуванням аварійне завершення втрачає не більше ~2% буфера
+        self.flush_every = flush_every or max(1, min(10000, capacity // 100))
+        self._pushes = 0
+        self._clean = True
+        os.makedirs(directory, exist_ok=True)
+        if os.path.exists(self._path(self.HEADER)):
+            self._open()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _new_array(self, name: str, shape: tuple, dtype) -> np.ndarray:
+        return np.lib.format.open_memmap(self._path(f'{name}.npy'), mode='w+', dtype=dtype, shape=shape)
+
+    def _open(self) -> None:
+        with open(self._path(self.HEADER)) as f:
+            header = json.load(f)
+        if header['capacity'] != self.capacity:
+            raise ValueError(f"Memory in {self.directory} has capacity {header['capacity']}, "
+                             f"expected {self.capacity}")
+        if header['obs_dtype'] is None:
+            return
+        self.obs_dtype = np.dtype(header['obs_dtype'])
+        for name in self._ARRAYS:
+            setattr(self, name, np.load(self._path(f'{name}.npy'), mmap_mode='r+'))
+        self.pos, self.filled, self.size = header['pos'], header['filled'], header['size']
+        self._last_done = header['last_done']
+        if not header['clean']:
+            self._repair(header['flush_every'])
+
+    def _repair(self, flush_every: int) -> None:
+        # Кожен push після flush зсуває pos не більше ніж на 2 і перезаписує
+        # next_state попереднього слота
+        span = np.arange(-1, 2 * flush_every + 1)
+        self.valid[(self.pos + span) % self._slots] = False
+        self.size = int(self.valid[self._window_slots(np.arange(self.filled))].sum())
+        self._last_done = True
+
+    def _write_header(self, clean: bool) -> None:
+        header = {
+            'capacity': self.capacity, 'pos': self.pos, 'filled': self.filled, 'size': self.size,
+            'last_done': self._last_done, 'flush_every': self.flush_every, 'clean': clean,
+            'obs_dtype': None if self.observations is None else self.obs_dtype.str,
+            'obs_shape': None if self.observations is None else list(self.observations.shape[1:])
+        }
+        path = self._path(self.HEADER)
+        with open(path + '.tmp', 'w') as f:
+            json.dump(header, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(path + '.tmp', path)
+        self._clean = clean
+
+    def _flush(self, clean: bool) -> None:
+        # Спершу дані, потім заголовок, що на них посилається
+        if self.observations is not None:
+            for name in self._ARRAYS:
+                getattr(self, name).flush()
+        self._write_header(clean)
+
+    def flush(self) -> None:
+        with self.lock:
+            self._flush(clean=False)
+
+    def close(self) -> None:
+        with self.lock:
+            self._flush(clean=True)
+
+    def _push(self, state, action, reward, next_state, done) -> int:
+        if self._clean:
+            # Перший запис після відкриття: до наступного flush буфер "брудний"
+            if self.observations is None:
+                self._allocate(np.asarray(state))
+            self._write_header(clean=False)
+        slot = super()._push(state, action, reward, next_state, done)
+        self._pushes += 1
+        if self._pushes % self.flush_every == 0:
+            self._flush(clean=False)
+        return slot
+
+    def state_dict(self) -> dict:
+        # Дані вже на диску: чекпойнт посилається на директорію, а не копіює її
+        self.flush()
+        return {'capacity': self.capacity, 'directory': os.path.abspath(self.directory)}
+
+    def load_state_dict(self, state: dict) -> None:
+        if state['capacity'] != self.capacity:
+            raise ValueError(f"Checkpoint memory capacity {state['capacity']} != {self.capacity}")
+        if os.path.abspath(state['directory']) != os.path.abspath(self.directory):
+            with self.lock:
+                self.directory = state['directory']
+                self._open()
+
+# Скалярні відповідники ufunc для швидкого оновлення одного листка
+_SCALAR_OPS = {np.add: operator.add, np.minimum: min, np.maximum: max}
+
+
+class SegmentTree:
+    """Дерево відрізків у масиві: O(log n) оновлення та запити.
+
+    Листки лежать в ``tree[leaves:]``, вузол ``k`` агрегує ``2k`` і ``2k + 1``.
+    Пакетні оновлення та пошук за префіксною сумою векторизовані по батчу.
+    """
+
+    def __init__(self, capacity: int, op, neutral: float):
+        self.leaves = 1 << max(capacity - 1, 1).bit_length()
+        self.op = op
+        self._scalar_op = _SCALAR_OPS.get(op, op)
+        self.neutral = neutral
+        self.tree = np.full(2 * self.leaves, neutral, dtype=np.float64)
+
+    def __getitem__(self, idx):
+        return self.tree[np.asarray(idx) + self.leaves]
+
+    def total(self) -> float:
+        return float(self.tree[1])
+
+    def set(self, idx: int, value: float) -> None:
+        tree = self.tree
+        op = self._scalar_op
+        pos = idx + self.leaves
+        tree[pos] = value
+        pos //= 2
+        while pos:
+            tree[pos] = op(tree[2 * pos], tree[2 * pos + 1])
+            pos //= 2
+
+    def update(self, idx: np.ndarray, values: np.ndarray) -> None:
+        tree = self.tree
+        pos = np.asarray(idx) + self.leaves
+        tree[pos] = values
+        # Піднімаємося рівень за рівнем, перераховуючи лише зачеплені вузли
+        pos = np.unique(pos // 2)
+        while pos[0] > 0:
+            tree[pos] = self.op(tree[2 * pos], tree[2 * pos + 1])
+            pos = np.unique(pos // 2)
+
+    def find_prefixsum(self, mass: np.ndarray) -> np.ndarray:
+        """Для sum-дерева: листки, у чиї відрізки потрапляють значення mass"""
+        tree = self.tree
+        idx = np.ones(len(mass), dtype=np.int64)
+        while idx[0] < self.leaves:
+            left = 2 * idx
+            left_sum = tree[left]
+            go_right = mass >= left_sum
+            mass = np.where(go_right, mass - left_sum, mass)
+            idx = np.where(go_right, left + 1, left)
+        return idx - self.leaves
+
+
+class ReplayBuffer(ReplayMemory):
+    """Prioritized Experience Replay поверх ReplayMemory.
+
+    Пріоритети p^alpha зберігаються в sum-дереві (пропорційна вибірка за
+    O(log n)) і min-дереві (нормування ваг importance sampling). Нові переходи
+    отримують максимальний пріоритет; недійсні слоти мають нульовий і тому
+    ніколи не вибираються. beta лінійно зростає від beta_start до 1 за
+    beta_frames викликів ``sample``.
+    """
+
+    def __init__(self, capacity: int, alpha: float = 0.6, beta_start: float = 0.4,
+                 beta_frames: int = 100000, eps: float = 1e-6, obs_dtype=None):
+        super().__init__(capacity, obs_dtype=obs_dtype)
+        self.alpha = alpha
+        self.beta_start = beta_start
+        self.beta_frames = beta_frames
+        self.eps = eps
+        self.frame = 0
+        self.max_priority = 1.0
+        self.sum_tree = SegmentTree(self._slots, np.add, 0.0)
+        self.min_tree = SegmentTree(self._slots, np.minimum, np.inf)
+
+    def state_dict(self) -> dict:
+        state = super().state_dict()
+        with self.lock:
+            state.update(frame=self.frame, max_priority=self.max_priority,
+                         sum_tree=self.sum_tree.tree.copy(), min_tree=self.min_tree.tree.copy())
+        return state
+
+    def load_state_dict(self, state: dict) -> None:
+        super().load_state_dict(state)
+        with self.lock:
+            self.frame = state['frame']
+            self.max_priority = state['max_priority']
+            self.sum_tree.tree = state['sum_tree']
+            self.min_tree.tree = state['min_tree']
+
+    @property
+    def beta(self) -> float:
+        return min(1.0, self.beta_start + self.frame * (1.0 - self.beta_start) / self.beta_frames)
+
+    def _advance(self, valid: bool) -> None:
+        entered = self.pos
+        super()._advance(valid)
+        self._set_priority(entered, valid)
+        # Новий pos зберігає лише next_state і не може бути вибраний
+        self._set_priority(self.pos, False)
+
+    def _set_priority(self, slot: int, valid: bool) -> None:
+        if valid:
+            priority = self.max_priority ** self.alpha
+            self.sum_tree.set(slot, priority)
+            self.min_tree.set(slot, priority)
+        elif self.sum_tree.tree[slot + self.sum_tree.leaves] != 0.0:
+            self.sum_tree.set(slot, 0.0)
+            self.min_tree.set(slot, np.inf)
+
+    def sample_slots(self, batch_size: int) -> np.ndarray:
+        # Стратифікована вибірка: по одному значенню з кожного з batch_size відрізків
+        total = self.sum_tree.total()
+        segment = total / batch_size
+        mass = (np.arange(batch_size) + np.random.random_sample(batch_size)) * segment
+        idx = self.sum_tree.find_prefixsum(np.minimum(mass, np.nextafter(total, 0)))
+        # Через похибку округлення можна влучити в нульовий листок
+        invalid = ~self.valid[idx]
+        while invalid.any():
+            mass = np.random.random_sample(int(invalid.sum())) * total
+            idx[invalid] = self.sum_tree.find_prefixsum(mass)
+            invalid = ~self.valid[idx]
+        return idx
+
+    def sample(self, batch_size: int, out: Optional[Tuple[np.ndarray, ...]] = None):
+        """Повертає (states, actions, rewards, next_states, dones, indices, weights)"""
+        with self.lock:
+            return self._sample(batch_size, out)
+
+    def _sample(self, batch_size: int, out: Optional[Tuple[np.ndarray, ...]] = None):
+        idx = self.sample_slots(batch_size)
+        beta = self.beta
+        self.frame += 1
+
+        total = self.sum_tree.total()
+        probs = self.sum_tree[idx] / total
+        min_prob = self.min_tree.total() / total
+        weights = (probs / min_prob) ** -beta
+        return (*self.gather(idx, out), idx, weights.astype(np.float32))
+
+    def update_priorities(self, indices: np.ndarray, td_errors: np.ndarray) -> None:
+        with self.lock:
+            self._update_priorities(indices, td_errors)
+
+    def _update_priorities(self, indices: np.ndarray, td_errors: np.ndarray) -> None:
+        # Слоти, що вже вийшли з вікна, не оновлюємо
+        keep = self.valid[indices]
+        indices = np.asarray(indices)[keep]
+        if not len(indices):
+            return
+        priorities = np.abs(np.asarray(td_errors, dtype=np.float64)[keep]) + self.eps
+        self.max_priority = max(self.max_priority, float(priorities.max()))
+        priorities = priorities ** self.alpha
+        self.sum_tree.update(indices, priorities)
+        self.min_tree.update(indices, priorities)
@@ -0,0 +1,142 @@
+# sender.py
+import asyncio
+import time
+from collections import deque
+from fastapi import WebSocket
+from typing import Optional
+from frames import FrameEncoder, snapshot_to_grid
+from metrics import Metrics
+
+
+class OutboundSender:
+    """Черга вихідних повідомлень одного websocket-з'єднання.
+
+    ``put_nowait`` ніколи не блокує джерело: зі станів зберігається лише
+    останній, і він надсилається не частіше ніж ``fps`` разів на секунду;
+    progress-повідомлення, що накопичились, поки клієнт не встигав,
+    надсилаються одним ``progressBatch``, а понад ``max_pending`` найстаріші
+    з них відкидаються. Решта повідомлень (status, complete, error)
+    надсилається без втрат і в порядку надходження. ``None`` - кінець потоку.
+    """
+
+    def __init__(self, websocket: WebSocket, state_format: str = 'json', fps: float = 20,
+                 max_pending: int = 1000, metrics: Optional[Metrics] = None):
+        self.websocket = websocket
+        # Час надсилань пишеться у фазу ws_send
+        self.metrics = metrics
+        self.state_format = state_format
+        self.interval = 1.0 / fps if fps > 0 else 0.0
+        self.max_pending = max_pending
+        self.encoder = FrameEncoder()
+        self._messages = deque()
+        self._n_progress = 0
+        self._state = None
+        self._last_state_time = float('-inf')
+        self._wake = asyncio.Event()
+        self._finished = False
+        self._closed = False
+
+        self.sent_states = 0
+        self.coalesced_states = 0
+        self.dropped_progress = 0
+
+    def put_nowait(self, message) -> None:
+        if message is None:
+            self._finished = True
+        elif message["type"] == "state":
+            if self._state is not None:
+                self.coalesced_states += 1
+            self._state = message["data"]
+        else:
+            if message["type"] == "progress":
+                if self._n_progress >= self.max_pending:
+                    self._drop_oldest_progress()
+                self._n_progress += 1
+            self._messages.append(message)
+        self._wake.set()
+
+    def close(self) -> None:
+        """Зупиняє run без надсилання решти (клієнт відключився)"""
+        self._closed = True
+        self._wake.set()
+
+    def _drop_oldest_progress(self) -> None:
+        for k, message in enumerate(self._messages):
+            if message["type"] == "progress":
+                del self._messages[k]
+                self._n_progress -= 1
+                self.dropped_progress += 1
+                return
+
+    async def run(self) -> bool:
+        """Надсилає повідомлення до кінця потоку; False - якщо з'єднання закрито раніше"""
+        while not self._closed:
+            # Скидається до надсилань: put_nowait під час await не загубиться
+            self._wake.clear()
+            await self._flush_messages()
+            delay = await self._flush_state()
+            if self._finished and not self._messages and self._state is None:
+                return True
+            if self._messages or self._closed:
+                continue
+            try:
+                # Стан чекає свого слота кадру; інакше - наступного повідомлення
+                await asyncio.wait_for(self._wake.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+        return False
+
+    async def _flush_messages(self) -> None:
+        # Лише те, що вже накопичилось: нові повідомлення не відкладають стан
+        pending, self._messages = self._messages, deque()
+        self._n_progress = 0
+        while pending and not self._closed:
+            message = pending.popleft()
+            if message["type"] != "progress":
+                # Останній стан іде раніше за complete/error
+                if message["type"] in ("complete", "error"):
+                    await self._flush_state(force=True)
+                await self._send(message)
+                continue
+            # Усі progress-повідомлення до наступного іншого - одним пакетом
+            batch = [message["data"]]
+            while pending and pending[0]["type"] == "progress":
+                batch.append(pending.popleft()["data"])
+            if len(batch) == 1:
+                await self._send({"type": "progress", "data": batch[0]})
+            else:
+                await self._send({"type": "progressBatch", "data": batch})
+
+    async def _flush_state(self, force: bool = False):
+        """Надсилає останній стан, якщо настав його кадр; повертає час до кадру"""
+        if self._state is None or self._closed:
+            return None
+        wait = self._last_state_time + self.interval - time.monotonic()
+        # Останній стан завершеного потоку надсилається без очікування
+        if wait > 0 and not (force or self._finished):
+            return wait
+
+        state, self._state = self._state, None
+        self._last_state_time = time.monotonic()
+        self.sent_states += 1
+        if self.state_format == 'binary':
+            await self._send(frame=self.encoder.encode(state))
+        else:
+            await self._send({"type": "state", "data": snapshot_to_grid(state)})
+        return None
+
+    async def _send(self, message: dict = None, frame: bytes = None) -> None:
+        start = time.perf_counter_ns()
+        if frame is not None:
+            await self.websocket.send_bytes(frame)
+        else:
+            await self.websocket.send_json(message)
+        if self.metrics is not None:
+            self.metrics.record('ws_send', start)
+
+    def stats(self) -> dict:
+        return {
+            'sent_states': self.sent_states,
+            'coalesced_states': self.coalesced_states,
+            'dropped_progress': self.dropped_progress
+        }
@@ -0,0 +1,51 @@
+# test_bitboard_parity.py
+"""Паритет BitboardGameEnv зі списковим SimplifiedGameEnv.
+
+Обидва рушії з однаковим seed і однаковими діями мають давати однакові
+спостереження, винагороди та ознаки завершення на кожному кроці.
+
+    cd backend && python -m pytest -q test_bitboard_parity.py
+"""
+import os
+import random
+import sys
+import numpy as np
+import pytest
+
+# Модулі backend імпортуються як скрипти (from environment import ...)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from environment import SimplifiedGameEnv
+from bitboard_environment import BitboardGameEnv
+
+SEEDS = range(10)
+STEPS = 300
+
+
+def _rollout(cls, seed: int, actions, **env_kwargs):
+    random.seed(seed)
+    np.random.seed(seed)
+    env = cls(**env_kwargs)
+    trace = [(env.reset(), None, None, None)]
+    for action in actions:
+        state, reward, done, truncated, _ = env.step(int(action))
+        trace.append((state, reward, done, truncated))
+        if done or truncated:
+            trace.append((env.reset(), None, None, None))
+    return trace
+
+
+@pytest.mark.parametrize("dynamic_obstacles", [False, True])
+@pytest.mark.parametrize("size", [3, 5, 8])
+def test_bitboard_matches_list_engine(size, dynamic_obstacles):
+    env_kwargs = dict(size=size, n_coins=max(1, size // 2), n_obstacles=size // 2,
+                      dynamic_obstacles=dynamic_obstacles)
+    for seed in SEEDS:
+        actions = np.random.default_rng(seed).integers(0, 8, STEPS)
+        expected = _rollout(SimplifiedGameEnv, seed, actions, **env_kwargs)
+        actual = _rollout(BitboardGameEnv, seed, actions, **env_kwargs)
+        assert len(actual) == len(expected)
+        for step, (want, got) in enumerate(zip(expected, actual)):
+            context = f"seed {seed}, step {step}"
+            np.testing.assert_array_equal(got[0], want[0], err_msg=context)
+            assert got[1:] == want[1:], context
@@ -0,0 +1,67 @@
+# test_import_time.py
+"""Бюджети часу холодного імпорту точок входу backend.
+
+Кожен модуль імпортується в окремому процесі з ``python -X importtime``;
+береться найкращий з ``IMPORT_TIME_REPEAT`` запусків кумулятивний час.
+Тест падає, якщо модуль перевищує бюджет (помножений на
+``IMPORT_TIME_SCALE`` для повільних машин) або тягне за собою важкі
+залежності, які мають завантажуватися лише на своїх шляхах виконання.
+
+    cd backend && python -m pytest -q test_import_time.py
+"""
+import os
+import re
+import subprocess
+import sys
+import pytest
+
+# Бюджети в мілісекундах
+BUDGETS = {
+    'environment': 250,
+    'bitboard_environment': 250,
+    'vec_environment': 250,
+    'optimized_environment': 250,
+    'replay': 250,
+    'numpy_policy': 250,
+    'main': 1000,
+    'server': 1000,
+}
+
+# Модулі, що не повинні імпортуватися при старті
+HEAVY = ('torch', 'matplotlib', 'seaborn', 'wandb', 'IPython')
+
+REPEAT = int(os.environ.get('IMPORT_TIME_REPEAT', 3))
+SCALE = float(os.environ.get('IMPORT_TIME_SCALE', 1.0))
+
+_LINE = re.compile(r"import time:\s+\d+\s+\|\s+(\d+)\s+\|\s?(\s*)(\S+)")
+
+
+def measure(module: str):
+    """(кумулятивний час у мс, список завантажених важких модулів)"""
+    code = f"import sys, {module}; print(' '.join(m for m in {HEAVY!r} if m in sys.modules))"
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                            capture_output=True, text=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__)))
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+
+    cumulative = None
+    for line in result.stderr.splitlines():
+        match = _LINE.match(line)
+        # Модуль верхнього рівня не має відступу в дереві імпортів
+        if match and not match.group(2) and match.group(3) == module:
+            cumulative = int(match.group(1)) / 1000
+    return cumulative, result.stdout.split()
+
+
+def check(module: str, repeat: int = REPEAT, scale: float = SCALE):
+    """(найкращий час у мс, ліміт у мс, важкі модулі першого запуску)"""
+    runs = [measure(module) for _ in range(repeat)]
+    return min(ms for ms, _ in runs), BUDGETS[module] * scale, runs[0][1]
+
+
+@pytest.mark.parametrize("module", list(BUDGETS))
+def test_import_time_within_budget(module):
+    best, limit, heavy = check(module)
+    assert not heavy, f"import {module} loads {', '.join(heavy)}"
+    assert best <= limit, f"import {module} took {best:.1f} ms (budget {limit:.0f} ms)"
@@ -0,0 +1,53 @@
+# test_sender.py
+"""OutboundSender: стан, що надійшов під час надсилання, не губиться.
+
+    cd backend && python -m pytest -q test_sender.py
+"""
+import asyncio
+import os
+import sys
+
+# Модулі backend імпортуються як скрипти (from environment import ...)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sender import OutboundSender
+
+STATE = {"size": 4, "agent": 0, "coins": [5], "obstacles": []}
+
+
+class FakeWebSocket:
+    """Під час надсилання першого стану кладе в sender наступний"""
+
+    def __init__(self):
+        self.sender = None
+        self.sent = []
+        self.second_state_sent = asyncio.Event()
+
+    async def send_json(self, message):
+        await asyncio.sleep(0)
+        n_states = sum(m["type"] == "state" for m in self.sent)
+        if message["type"] == "state" and n_states == 0:
+            self.sender.put_nowait({"type": "state", "data": {**STATE, "agent": 1}})
+        self.sent.append(message)
+        if message["type"] == "state" and n_states == 1:
+            self.second_state_sent.set()
+
+    async def send_bytes(self, frame):
+        self.sent.append(frame)
+
+
+def test_state_arriving_during_send_is_flushed():
+    async def scenario():
+        websocket = FakeWebSocket()
+        sender = websocket.sender = OutboundSender(websocket, fps=20)
+        runner = asyncio.ensure_future(sender.run())
+        sender.put_nowait({"type": "state", "data": STATE})
+        try:
+            # Без інших повідомлень стан має піти у своєму кадрі, а не чекати наступного
+            await asyncio.wait_for(websocket.second_state_sent.wait(), timeout=2)
+        finally:
+            sender.put_nowait(None)
+            await asyncio.wait_for(runner, timeout=2)
+        assert [m["type"] for m in websocket.sent] == ["state", "state"]
+
+    asyncio.run(scenario())
@@ -0,0 +1,46 @@
+# test_train_resume.py
+"""Збереження та продовження тренування train.train з чекпойнта.
+
+    cd backend && python -m pytest -q test_train_resume.py
+"""
+import os
+import sys
+import numpy as np
+import pytest
+
+# Модулі backend імпортуються як скрипти (from environment import ...)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+pytest.importorskip('torch')
+pytest.importorskip('matplotlib')
+
+import plot_results
+from environment import EnhancedGameEnv
+from agent import Agent
+from train import train
+from utils import set_seed
+
+
+def _run(checkpoint_dir, episodes, resume):
+    set_seed(0)
+    env = EnhancedGameEnv(size=4, n_coins=1, n_obstacles=1)
+    agent = Agent((7, 4, 4), 8, memory_size=500)
+    agent.batch_size = 8
+    return train(env, agent, episodes=episodes, render_every=1000, checkpoint_dir=checkpoint_dir,
+                 checkpoint_every=2, resume=resume, headless=True, plot_every=1000)
+
+
+def test_train_resumes_from_checkpoint(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    # Фінальні графіки (seaborn, plt.show) тут не потрібні
+    monkeypatch.setattr(plot_results, 'plot_results', lambda scores, losses: None)
+    checkpoint_dir = str(tmp_path / 'checkpoints')
+
+    scores, losses = _run(checkpoint_dir, episodes=4, resume=False)
+    assert len(scores) == 4 and losses
+
+    # Продовження з епізоду 4 з історією попереднього запуску
+    resumed_scores, resumed_losses = _run(checkpoint_dir, episodes=6, resume=True)
+    assert len(resumed_scores) == 6
+    assert resumed_scores[:4] == scores
+    np.testing.assert_allclose(resumed_losses[:len(losses)], losses)
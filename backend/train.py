@@ -1,21 +1,39 @@
 # train.py
 import time
-import matplotlib.pyplot as plt
 import numpy as np
 from environment import EnhancedGameEnv
 from agent import Agent
+from checkpoint import CheckpointManager, latest_checkpoint, load_checkpoint
+from recorder import EpisodeRecorder
 from utils import DEVICE, setup_cuda, set_seed
-from plot_results import plot_results, create_live_plot, update_live_plot
 
 
-def train(env, agent, episodes=500, render_every=50):
+def train(env, agent, episodes=500, render_every=50,
+          checkpoint_dir=None, checkpoint_every=50, resume=False, record_dir=None,
+          plot_every=1, headless=False):
+    # Графіки (matplotlib, seaborn) потрібні лише тут, тож імпортуються ліниво
+    from plot_results import plot_results, LivePlot
+
     scores = []
     losses = []
+    first_episode = 0
+    checkpoints = None
+    if checkpoint_dir:
+        # Продовжуємо з останнього чекпойнта разом з історією для графіків
+        path = latest_checkpoint(checkpoint_dir) if resume else None
+        if path is not None:
+            resumed = load_checkpoint(path, agent)
+            first_episode = resumed['step'] + 1
+            scores, losses = resumed['extra']['scores'], resumed['extra']['losses']
+        checkpoints = CheckpointManager(checkpoint_dir)
+    # Переходи для офлайн-тренування (recorder.OfflineDataset)
+    recorder = EpisodeRecorder(record_dir) if record_dir else None
 
-    # Створюємо живий графік
-    fig, lines = create_live_plot()
+    # Живий графік; headless - лише файл кожні plot_every епізодів
+    live_plot = LivePlot(render_every=plot_every, headless=headless)
+    live_plot.extend(scores, losses)
 
-    for episode in range(episodes):
+    for episode in range(first_episode, episodes):
         state = env.reset()
         total_reward = 0
         episode_losses = []
@@ -28,6 +46,8 @@ def train(env, agent, episodes=500, render_every=50):
             next_state, reward, done, _, info = env.step(action)
 
             agent.remember(state, action, reward, next_state, done)
+            if recorder is not None:
+                recorder.record(state, action, reward, next_state, done)
             loss = agent.train()
 
             if loss is not None:
@@ -42,18 +62,26 @@ def train(env, agent, episodes=500, render_every=50):
         agent.update_epsilon()
         scores.append(total_reward)
         if episode_losses:
-            losses.append(np.mean(episode_losses))
+            losses.append(float(np.mean(episode_losses)))
 
         # Оновлюємо живий графік
-        update_live_plot(fig, lines, scores, losses)
+        live_plot.update(total_reward, losses[-1] if episode_losses else None)
+
+        if checkpoints is not None and ((episode + 1) % checkpoint_every == 0 or episode + 1 == episodes):
+            checkpoints.save(agent, episode, score=total_reward,
+                             extra={'scores': list(scores), 'losses': list(losses)})
 
         if episode % 10 == 0:
-            avg_score = np.mean(scores[-100:]) if len(scores) >= 100 else np.mean(scores)
+            avg_score = live_plot.avg_scores[-1]
             print(f'Episode: {episode}, Score: {total_reward:.2f}, '
                   f'Average Score: {avg_score:.2f}, Epsilon: {agent.epsilon:.3f}')
 
+    if recorder is not None:
+        recorder.close()
+    if checkpoints is not None:
+        checkpoints.close()
     env.close()
-    plt.close(fig)
+    live_plot.close()
 
     # Зберігаємо фінальні графіки
     plot_results(scores, losses)
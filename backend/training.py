@@ -0,0 +1,244 @@
+# training.py
+import logging
+import time
+import numpy as np
+from typing import Callable
+from environment import SimplifiedGameEnv
+from bitboard_environment import BitboardGameEnv
+from frames import snapshot
+
+logger = logging.getLogger(__name__)
+
+
+class TrainingStats:
+    def __init__(self):
+        self.start_time = None
+        self.total_steps = 0
+        self.best_reward = float('-inf')
+        self.total_reward = 0
+        self.episode_count = 0
+
+    def start(self):
+        self.start_time = time.time()
+        self._start_monotonic = time.monotonic()
+
+    def update(self, reward, steps):
+        self.total_steps += steps
+        self.total_reward += reward
+        self.episode_count += 1
+        self.best_reward = max(self.best_reward, reward)
+
+    def state_dict(self):
+        elapsed = time.monotonic() - self._start_monotonic if self.start_time is not None else 0.0
+        return {
+            "total_steps": self.total_steps,
+            "best_reward": self.best_reward,
+            "total_reward": self.total_reward,
+            "episode_count": self.episode_count,
+            "elapsed": elapsed
+        }
+
+    def load_state_dict(self, state):
+        # Час тренування продовжується з моменту чекпойнта
+        self.total_steps = state["total_steps"]
+        self.best_reward = state["best_reward"]
+        self.total_reward = state["total_reward"]
+        self.episode_count = state["episode_count"]
+        if self.start_time is None:
+            self.start()
+        self.start_time -= state["elapsed"]
+        self._start_monotonic -= state["elapsed"]
+
+    @property
+    def average_reward(self):
+        return self.total_reward / max(1, self.episode_count)
+
+    @property
+    def training_time(self):
+        if self.start_time is None:
+            return 0
+        return int(time.time() - self.start_time)
+
+    @property
+    def steps_per_second(self):
+        if self.start_time is None:
+            return 0.0
+        # Дробові секунди: на початку тренування ціле training_time дає 0
+        return self.total_steps / max(time.monotonic() - self._start_monotonic, 1e-9)
+
+    def get_stats(self):
+        return {
+            "averageReward": round(self.average_reward, 3),
+            "trainingTime": self.format_time(self.training_time),
+            "bestReward": round(self.best_reward, 3),
+            "stepsPerSecond": round(self.steps_per_second, 1)
+        }
+
+    @staticmethod
+    def format_time(seconds):
+        hours = seconds // 3600
+        minutes = (seconds % 3600) // 60
+        seconds = seconds % 60
+        return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+
+
+def create_env(env_config: dict):
+    # Бітборд-рушій для малих дошок, якщо його явно запитано
+    env_cls = SimplifiedGameEnv
+    if env_config.get('engine') == 'bitboard':
+        env_cls = BitboardGameEnv
+    return env_cls(
+        size=env_config['size'],
+        n_coins=env_config['nCoins'],
+        n_obstacles=env_config['nObstacles'],
+        dynamic_obstacles=env_config.get('dynamicObstacles', False),
+        rewards=env_config.get('rewards'),
+        incremental=True
+    )
+
+
+def run_training(config: dict, emit: Callable[[dict], None], should_stop: Callable[[], bool]) -> None:
+    """Синхронний цикл тренування за конфігурацією з websocket.
+
+    Виконується поза event loop (у процесі JobManager) і передає повідомлення
+    протоколу через ``emit``. ``should_stop`` перевіряється на кожному кроці,
+    тож скасування зупиняє тренування. ``config['renderSteps']`` (за
+    замовчуванням True) - надсилати стан на кожному кроці епізодів для
+    рендерингу, а не лише в їхньому кінці. State-повідомлення містять
+    знімок позицій (frames.snapshot); у формат клієнта його перетворює
+    stream_job.
+
+    Якщо задано ``config['checkpointDir']``, кожні
+    ``trainingConfig.checkpointEvery`` епізодів (і при зупинці) туди
+    асинхронно пишеться чекпойнт; ``trainingConfig.checkpointMemory``
+    додає до нього replay memory. ``config['resumeDir']`` - директорія, з
+    останнього чекпойнта якої тренування продовжується: з наступного
+    епізоду, з тими самими вагами, оптимізатором, epsilon, статистикою і
+    генераторами випадкових чисел.
+
+    ``config['recordDir']`` - директорія, куди EpisodeRecorder пише всі
+    переходи для офлайн-тренування та аналізу.
+    """
+    # torch імпортується лише при першому тренуванні, а не при старті сервера
+    from agent import SimplifiedAgent
+
+    env_config = config['envConfig']
+    env = create_env(env_config)
+    logger.info("Environment created successfully")
+
+    agent = SimplifiedAgent(
+        state_shape=(7, env_config['size'], env_config['size']),
+        n_actions=8,
+        learning_rate=config['agentConfig']['learningRate'],
+        memory_size=config['agentConfig'].get('memorySize', 10000),
+        memory_dir=config['agentConfig'].get('memoryDir')
+    )
+    logger.info("Agent created successfully")
+    emit({"type": "status", "data": "Training initialized successfully"})
+
+    training_config = config['trainingConfig']
+    render_every = training_config.get('renderEvery', 50)
+    render_steps = config.get('renderSteps', True)
+    stats = TrainingStats()
+    stats.start()
+
+    first_episode = 0
+    if config.get('resumeDir'):
+        from checkpoint import latest_checkpoint, load_checkpoint
+        path = latest_checkpoint(config['resumeDir'])
+        if path is None:
+            agent.close()
+            raise ValueError(f"No checkpoint found in {config['resumeDir']}")
+        resumed = load_checkpoint(path, agent)
+        first_episode = resumed['step'] + 1
+        stats.load_state_dict(resumed['extra']['stats'])
+        emit({"type": "status", "data": f"Resumed from episode {resumed['step']}"})
+
+    checkpoints = None
+    checkpoint_every = training_config.get('checkpointEvery', 50)
+    if config.get('checkpointDir'):
+        from checkpoint import CheckpointManager
+        checkpoints = CheckpointManager(config['checkpointDir'],
+                                        include_memory=training_config.get('checkpointMemory', False))
+    recorder = None
+    if config.get('recordDir'):
+        from recorder import EpisodeRecorder
+        recorder = EpisodeRecorder(config['recordDir'])
+    # Фази циклу пишуться поруч із фазами агента
+    metrics = agent.metrics
+
+    try:
+        for episode in range(first_episode, training_config['episodes']):
+            state = env.reset()
+            total_reward = 0
+            episode_losses = []
+            done = False
+            steps_in_episode = 0
+            render = episode % render_every == 0
+
+            # Початковий стан тільки для епізодів, які треба рендерити
+            if render and render_steps:
+                emit({"type": "state", "data": snapshot(env)})
+
+            while not done:
+                if should_stop():
+                    # Навчання незавершеного епізоду зберігається, а продовження
+                    # почнеться з цього ж епізоду на новій дошці
+                    if checkpoints is not None and episode > first_episode and episode % checkpoint_every:
+                        checkpoints.save(agent, episode - 1, extra={"stats": stats.state_dict()})
+                    return
+                action = agent.get_action(state)
+                start = time.perf_counter_ns()
+                next_state, reward, done, _, info = env.step(action)
+                start = metrics.record('env_step', start)
+
+                agent.remember(state, action, reward, next_state, done)
+                start = metrics.record('remember', start)
+                if recorder is not None:
+                    recorder.record(state, action, reward, next_state, done)
+                    metrics.record('record', start)
+                loss = agent.train()
+
+                if loss is not None:
+                    episode_losses.append(float(loss))
+
+                state = next_state
+                total_reward += reward
+                steps_in_episode += 1
+
+                if render and render_steps:
+                    emit({"type": "state", "data": snapshot(env)})
+
+            # Оновлюємо статистику і epsilon
+            stats.update(total_reward, steps_in_episode)
+            agent.update_epsilon()
+            avg_loss = np.mean(episode_losses) if episode_losses else 0.0
+
+            emit({
+                "type": "progress",
+                "data": {
+                    "episode": episode,
+                    "score": float(total_reward),
+                    "loss": float(avg_loss),
+                    "epsilon": float(agent.epsilon),
+                    "steps": steps_in_episode,
+                    "stats": stats.get_stats(),
+                    "phases": metrics.summary()
+                }
+            })
+            # Повні гістограми для /metrics; клієнтам не пересилаються
+            emit({"type": "metrics", "data": metrics.snapshot()})
+
+            if render and not render_steps:
+                emit({"type": "state", "data": snapshot(env)})
+
+            last_episode = episode + 1 == training_config['episodes']
+            if checkpoints is not None and ((episode + 1) % checkpoint_every == 0 or last_episode):
+                checkpoints.save(agent, episode, score=total_reward, extra={"stats": stats.state_dict()})
+    finally:
+        if recorder is not None:
+            recorder.close()
+        if checkpoints is not None:
+            checkpoints.close()
+        agent.close()
+
@@ -0,0 +1,216 @@
+# vec_environment.py
+import numpy as np
+from typing import Tuple, Dict, Optional
+from environment import encode_observation, coin_distance_map, nearest_coin
+
+# Ті самі напрямки руху, що й у SimplifiedGameEnv.step
+MOVES = np.array([(-1, 0), (-1, 1), (0, 1), (1, 1),
+                  (1, 0), (1, -1), (0, -1), (-1, -1)], dtype=np.int64)
+OBSTACLE_MOVES = np.array([(0, 1), (1, 0), (0, -1), (-1, 0)], dtype=np.int64)
+
+
+class VecGameEnv:
+    """N незалежних дошок SimplifiedGameEnv, що крокують одним викликом.
+
+    Стан усіх дошок зберігається у складених масивах, тому рух, колізії,
+    збір монет, винагороди та 7-канальне спостереження обчислюються без
+    циклів по дошках. Завершені дошки автоматично скидаються: для них
+    ``step`` повертає перше спостереження нового епізоду, а термінальне
+    спостереження лежить в ``info["final_observation"]``.
+    """
+
+    def __init__(self, n_envs: int = 8, size: int = 6, n_coins: int = 1,
+                 n_obstacles: int = 2, dynamic_obstacles: bool = False,
+                 rewards: dict = None, seed: Optional[int] = None,
+                 obs_dtype=np.float64):
+        self.n_envs = n_envs
+        self.size = size
+        # Як і в _place_objects, об'єктів не може бути більше за вільні клітинки
+        self.n_coins = min(n_coins, size * size - 1)
+        self.n_obstacles = min(n_obstacles, size * size - 1 - self.n_coins)
+        self.dynamic_obstacles = dynamic_obstacles
+        self.rewards = rewards or {
+            'coinCollected': 1,
+            'collision': -1,
+            'step': -0.01,
+            'completion': 2,
+            'timeout': -0.5
+        }
+        self.action_space_n = 8
+        self.observation_space_shape = (7, size, size)
+        self.max_steps = size * size
+        self.rng = np.random.default_rng(seed)
+
+        self._rows = np.arange(n_envs)
+
+        self.agent_pos = np.zeros((n_envs, 2), dtype=np.int64)
+        self.coin_pos = np.zeros((n_envs, self.n_coins, 2), dtype=np.int64)
+        self.coin_alive = np.zeros((n_envs, self.n_coins), dtype=bool)
+        self.obstacle_pos = np.zeros((n_envs, self.n_obstacles, 2), dtype=np.int64)
+        self.coin_mask = np.zeros((n_envs, size, size), dtype=bool)
+        self.obstacle_mask = np.zeros((n_envs, size, size), dtype=bool)
+        self.steps = np.zeros(n_envs, dtype=np.int64)
+        self.score = np.zeros(n_envs, dtype=np.int64)
+        self.obs_dtype = np.dtype(obs_dtype)
+        self.grid = np.zeros((n_envs, 7, size, size), dtype=self.obs_dtype)
+        self.reset()
+
+    def reset(self) -> np.ndarray:
+        self._reset_boards(self._rows)
+        self._update_grid(self._rows)
+        return self.get_state()
+
+    def _reset_boards(self, idx: np.ndarray) -> None:
+        n_cells = self.size * self.size
+        center = self.size // 2
+        self.steps[idx] = 0
+        self.score[idx] = 0
+        self.agent_pos[idx] = center
+
+        # Випадкова перестановка клітинок кожної дошки: перші n_coins
+        # стають монетами, наступні n_obstacles - перешкодами
+        n_objects = self.n_coins + self.n_obstacles
+        keys = self.rng.random((len(idx), n_cells))
+        keys[:, center * self.size + center] = np.inf
+        cells = np.argpartition(keys, n_objects - 1, axis=1)[:, :n_objects] \
+            if n_objects else np.zeros((len(idx), 0), dtype=np.int64)
+        coins, obstacles = cells[:, :self.n_coins], cells[:, self.n_coins:]
+
+        self.coin_pos[idx] = np.stack(np.divmod(coins, self.size), axis=-1)
+        self.coin_alive[idx] = True
+        self.obstacle_pos[idx] = np.stack(np.divmod(obstacles, self.size), axis=-1)
+
+        coin_flat = self.coin_mask.reshape(self.n_envs, -1)
+        obstacle_flat = self.obstacle_mask.reshape(self.n_envs, -1)
+        coin_flat[idx] = False
+        obstacle_flat[idx] = False
+        coin_flat[idx[:, None], coins] = True
+        obstacle_flat[idx[:, None], obstacles] = True
+
+    def _update_grid(self, idx: np.ndarray) -> None:
+        k = len(idx)
+        planes = np.zeros((k, 7, self.size, self.size))
+        ax, ay = self.agent_pos[idx, 0], self.agent_pos[idx, 1]
+
+        # Базові канали
+        planes[np.arange(k), 0, ax, ay] = 1
+        planes[:, 1] = self.coin_mask[idx]
+        planes[:, 2] = self.obstacle_mask[idx]
+
+        alive = self.coin_alive[idx]
+        has_coins = alive.any(axis=1)
+        if self.n_coins:
+            # Distance map для монет: мінімум по живих монетах, усі дошки пакетом
+            min_dist = coin_distance_map(self.size, self.coin_pos[idx, :, 0], self.coin_pos[idx, :, 1], alive)
+            planes[:, 3] = np.where(has_coins[:, None, None],
+                                    1 - min_dist / (2 * self.size), 0)
+
+        # Вільний простір
+        planes[:, 4] = 1 - (planes[:, 0] + planes[:, 1] + planes[:, 2])
+
+        # Напрямок до найближчої монети (при рівності - перша за порядком)
+        if self.n_coins:
+            cx, cy = self.coin_pos[idx, :, 0], self.coin_pos[idx, :, 1]
+            closest = nearest_coin(cx, cy, ax, ay, alive)
+            dx = cx[np.arange(k), closest] - ax
+            dy = cy[np.arange(k), closest] - ay
+            dist = np.maximum(np.maximum(np.abs(dx), np.abs(dy)), 1)
+            planes[:, 5] = np.where(has_coins, dx / dist, 0)[:, None, None]
+            planes[:, 6] = np.where(has_coins, dy / dist, 0)[:, None, None]
+
+        self.grid[idx] = encode_observation(planes, self.obs_dtype)
+
+    def get_state(self, out: Optional[np.ndarray] = None) -> np.ndarray:
+        if out is None:
+            return self.grid.copy()
+        np.copyto(out, self.grid)
+        return out
+
+    def step(self, actions) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, Dict]:
+        actions = np.asarray(actions, dtype=np.int64)
+        rows = self._rows
+        self.steps += 1
+
+        # Рух агентів
+        new_pos = np.clip(self.agent_pos + MOVES[actions], 0, self.size - 1)
+        collision = self.obstacle_mask[rows, new_pos[:, 0], new_pos[:, 1]]
+        self.agent_pos = np.where(collision[:, None], self.agent_pos, new_pos)
+        ax, ay = self.agent_pos[:, 0], self.agent_pos[:, 1]
+
+        # Збір монет
+        collected = ~collision & self.coin_mask[rows, ax, ay]
+        self.coin_mask[rows[collected], ax[collected], ay[collected]] = False
+        on_coin = (self.coin_pos == self.agent_pos[:, None, :]).all(axis=2)
+        self.coin_alive &= ~(on_coin & collected[:, None])
+        coins_left = self.coin_alive.sum(axis=1)
+        self.score += collected
+
+        # Винагороди
+        reward = np.where(collision, self.rewards['collision'], self.rewards['step']).astype(np.float64)
+        reward = np.where(collected, self.rewards['coinCollected'], reward)
+        completed = collected & (coins_left == 0)
+        reward += completed * self.rewards['completion']
+        timeout = ~collision & (self.steps >= self.max_steps)
+        reward += timeout * self.rewards['timeout']
+        done = completed | timeout
+
+        # Динамічні перешкоди
+        if self.dynamic_obstacles and self.n_obstacles:
+            active = ~done & (self.rng.random(self.n_envs) < 0.1)
+            if active.any():
+                self._update_dynamic_obstacles(active)
+
+        self._update_grid(rows)
+        info = {
+            "score": self.score.copy(),
+            "steps": self.steps.copy(),
+            "coins_left": coins_left
+        }
+
+        # Автоматичний reset завершених дошок
+        done_idx = np.flatnonzero(done)
+        if len(done_idx):
+            info["final_observation"] = self.grid[done_idx].copy()
+            info["final_index"] = done_idx
+            self._reset_boards(done_idx)
+            self._update_grid(done_idx)
+
+        return self.get_state(), reward, done, np.zeros(self.n_envs, dtype=bool), info
+
+    def _update_dynamic_obstacles(self, active: np.ndarray) -> None:
+        rows = self._rows
+        # Перешкоди рухаються по черзі, як у SimplifiedGameEnv, але кожна
+        # з них - одночасно на всіх активних дошках
+        for k in range(self.n_obstacles):
+            moving = active & (self.rng.random(self.n_envs) < 0.3)
+            if not moving.any():
+                continue
+            pos = self.obstacle_pos[:, k]
+            candidates = pos[:, None, :] + OBSTACLE_MOVES[None]
+            valid = ((candidates >= 0) & (candidates < self.size)).all(axis=2)
+            # Рівномірний вибір серед допустимих напрямків
+            choice = np.where(valid, self.rng.random((self.n_envs, 4)), -1).argmax(axis=1)
+            new_pos = np.clip(candidates[rows, choice], 0, self.size - 1)
+            nx, ny = new_pos[:, 0], new_pos[:, 1]
+
+            free = ~((nx == self.agent_pos[:, 0]) & (ny == self.agent_pos[:, 1]))
+            free &= ~self.coin_mask[rows, nx, ny]
+            free &= ~self.obstacle_mask[rows, nx, ny]
+            move = moving & valid.any(axis=1) & free
+
+            m = rows[move]
+            self.obstacle_mask[m, pos[move, 0], pos[move, 1]] = False
+            self.obstacle_mask[m, nx[move], ny[move]] = True
+            self.obstacle_pos[m, k] = new_pos[move]
+
+    def render(self, index: int = 0) -> None:
+        grid = [[' ' for _ in range(self.size)] for _ in range(self.size)]
+
+        for i, j in zip(*np.nonzero(self.obstacle_mask[index])):
+            grid[i][j] = 'X'
+        for i, j in zip(*np.nonzero(self.coin_mask[index])):
+            grid[i][j] = 'O'
+        grid[self.agent_pos[index, 0]][self.agent_pos[index, 1]] = 'A'
+
+        print("\n".join([''.join(row) for row in grid]))
+        print(f"Score: {self.score[index]}, Steps: {self.steps[index]}")
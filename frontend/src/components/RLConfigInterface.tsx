@@ -7,6 +7,7 @@ import { LineChart, Line, XAxis, YAxis, CartesianGrid, Tooltip, Legend } from 'r
 import { CustomSlider } from './CustomSlider';
 // import { CustomSwitch } from './CustomSwitch';
 import EnvironmentView from './EnvironmentView';
+import { decodeFrame, snapshotToGrid, FrameSnapshot } from '@/lib/frames';
 import styles from '@/styles/RLConfig.module.css';
 
 const WS_URL = 'ws://127.0.0.1:8001/ws/train';
@@ -65,6 +66,8 @@ const RLConfigInterface = () => {
         try {
             console.log('Connecting to WebSocket...');
             const socket = new WebSocket(WS_URL);
+            socket.binaryType = 'arraybuffer';
+            let lastFrame: FrameSnapshot | null = null;
 
             socket.onopen = () => {
                 console.log('WebSocket connected');
@@ -76,13 +79,21 @@ const RLConfigInterface = () => {
                 const config = {
                     envConfig,
                     agentConfig,
-                    trainingConfig
+                    trainingConfig,
+                    stateFormat: 'binary'
                 };
                 socket.send(JSON.stringify(config));
                 setIsTraining(true);
             };
 
             socket.onmessage = (event) => {
+                // Бінарні повідомлення - кадри стану (ключові або дельти)
+                if (event.data instanceof ArrayBuffer) {
+                    lastFrame = decodeFrame(event.data, lastFrame);
+                    setGridState(snapshotToGrid(lastFrame));
+                    return;
+                }
+
                 const message = JSON.parse(event.data);
                 console.log('Received:', message);
 
@@ -90,6 +101,9 @@ const RLConfigInterface = () => {
                     case 'progress':
                         setTrainingData(prev => [...prev, message.data]);
                         break;
+                    case 'progressBatch':
+                        setTrainingData(prev => [...prev, ...message.data]);
+                        break;
                     case 'state':
                         setGridState(message.data);
                         break;
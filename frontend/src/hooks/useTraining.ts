@@ -6,6 +6,7 @@ import {
     ConnectionStatus,
     isWebSocketError,
 } from '@/types/websocket';
+import { decodeFrame, snapshotToGrid, FrameSnapshot } from '@/lib/frames';
 
 const getErrorMessage = (error: unknown): string => {
     if (error instanceof Error) return error.message;
@@ -20,6 +21,7 @@ export const useTraining = () => {
     const [gridState, setGridState] = useState<number[][][]>([]);
     const [connectionStatus, setConnectionStatus] = useState<ConnectionStatus>('disconnected');
     const wsRef = useRef<WebSocket | null>(null);
+    const lastFrame = useRef<FrameSnapshot | null>(null);
     const reconnectAttempts = useRef(0);
     const maxReconnectAttempts = 3;
 
@@ -27,6 +29,7 @@ export const useTraining = () => {
         try {
             console.log('Attempting to connect WebSocket...');
             const ws = new WebSocket('ws://localhost:8000/ws/train');
+            ws.binaryType = 'arraybuffer';
             wsRef.current = ws;
 
             ws.onopen = () => {
@@ -64,6 +67,13 @@ export const useTraining = () => {
 
             ws.onmessage = (event: MessageEvent) => {
                 try {
+                    // Бінарні повідомлення - кадри стану
+                    if (event.data instanceof ArrayBuffer) {
+                        lastFrame.current = decodeFrame(event.data, lastFrame.current);
+                        setGridState(snapshotToGrid(lastFrame.current));
+                        return;
+                    }
+
                     const message = JSON.parse(event.data) as WSMessage;
                     console.log('Received message:', message);
 
@@ -74,6 +84,9 @@ export const useTraining = () => {
                         case 'progress':
                             setProgress(prev => [...prev, message.data]);
                             break;
+                        case 'progressBatch':
+                            setProgress(prev => [...prev, ...message.data]);
+                            break;
                         case 'state':
                             setGridState(message.data);
                             break;
@@ -104,6 +117,7 @@ export const useTraining = () => {
         console.log('Starting training with config:', config);
         setError(null);
         setProgress([]);
+        lastFrame.current = null;
 
         if (!wsRef.current || wsRef.current.readyState !== WebSocket.OPEN) {
             wsRef.current = connectWebSocket();
@@ -111,7 +125,7 @@ export const useTraining = () => {
 
         if (wsRef.current && wsRef.current.readyState === WebSocket.OPEN) {
             try {
-                wsRef.current.send(JSON.stringify(config));
+                wsRef.current.send(JSON.stringify({ stateFormat: 'binary', ...config }));
                 setIsTraining(true);
             } catch (error: unknown) {
                 console.error('Error sending config:', error);
@@ -0,0 +1,69 @@
+// Декодер бінарних кадрів стану (backend/frames.py).
+// Клітинки передаються як i * size + j у uint16, little-endian.
+
+export const FRAME_KEY = 1;
+export const FRAME_DELTA = 2;
+
+export interface FrameSnapshot {
+    size: number;
+    agent: number;
+    coins: number[];
+    obstacles: number[];
+}
+
+const readCells = (view: DataView, offset: number, count: number): number[] => {
+    const cells: number[] = [];
+    for (let k = 0; k < count; k++) {
+        cells.push(view.getUint16(offset + 2 * k, true));
+    }
+    return cells;
+};
+
+export const decodeFrame = (buffer: ArrayBuffer, previous: FrameSnapshot | null): FrameSnapshot => {
+    const view = new DataView(buffer);
+    const frameType = view.getUint8(0);
+    const size = view.getUint8(1);
+    const agent = view.getUint16(2, true);
+
+    if (frameType === FRAME_KEY) {
+        const nCoins = view.getUint16(4, true);
+        const nObstacles = view.getUint16(6, true);
+        const cells = readCells(view, 8, nCoins + nObstacles);
+        return { size, agent, coins: cells.slice(0, nCoins), obstacles: cells.slice(nCoins) };
+    }
+    if (frameType !== FRAME_DELTA) {
+        throw new Error(`Unknown frame type ${frameType}`);
+    }
+    if (!previous) {
+        throw new Error('Delta frame without a previous frame');
+    }
+
+    const counts = [4, 6, 8, 10].map(offset => view.getUint16(offset, true));
+    const cells = readCells(view, 12, counts.reduce((a, b) => a + b, 0));
+    const groups: Set<number>[] = [];
+    let start = 0;
+    for (const count of counts) {
+        groups.push(new Set(cells.slice(start, start + count)));
+        start += count;
+    }
+    const [coinsRemoved, coinsAdded, obstaclesRemoved, obstaclesAdded] = groups;
+    return {
+        size,
+        agent,
+        coins: [...previous.coins.filter(c => !coinsRemoved.has(c)), ...Array.from(coinsAdded)],
+        obstacles: [...previous.obstacles.filter(o => !obstaclesRemoved.has(o)), ...Array.from(obstaclesAdded)]
+    };
+};
+
+// Площини агента, монет і перешкод - усе, що читає EnvironmentView
+export const snapshotToGrid = (snapshot: FrameSnapshot): number[][][] => {
+    const { size } = snapshot;
+    const planes = [0, 1, 2].map(() => Array.from({ length: size }, () => Array(size).fill(0)));
+    const mark = (plane: number, cell: number) => {
+        planes[plane][Math.floor(cell / size)][cell % size] = 1;
+    };
+    mark(0, snapshot.agent);
+    snapshot.coins.forEach(cell => mark(1, cell));
+    snapshot.obstacles.forEach(cell => mark(2, cell));
+    return planes;
+};
@@ -1,8 +1,17 @@
+export interface PhaseSummary {
+    count: number;
+    meanMs: number;
+    maxMs: number;
+    share: number;
+}
+
 export interface TrainingData {
     episode: number;
     score: number;
     loss: number;
     epsilon: number;
+    // Час фаз навчання (backend/metrics.py)
+    phases?: Record<string, PhaseSummary>;
 }
 
 export interface StateMessage {
@@ -15,6 +24,12 @@ export interface ProgressMessage {
     data: TrainingData;
 }
 
+// Кілька progress, що накопичились, поки клієнт не встигав
+export interface ProgressBatchMessage {
+    type: 'progressBatch';
+    data: TrainingData[];
+}
+
 export interface ErrorMessage {
     type: 'error';
     data: string;
@@ -33,6 +48,7 @@ export interface StatusMessage {
 export type WSMessage =
     | StateMessage
     | ProgressMessage
+    | ProgressBatchMessage
     | ErrorMessage
     | CompleteMessage
     | StatusMessage;
@@ -50,6 +66,12 @@ export interface TrainingConfiguration {
     envConfig: EnvConfig;
     agentConfig: AgentConfig;
     trainingConfig: TrainingConfig;
+    // 'binary': стан приходить бінарними ключовими/дельта-кадрами (lib/frames.ts)
+    stateFormat?: 'json' | 'binary';
+    // id завдання (наприклад 'job-3'), з останнього чекпойнта якого продовжити
+    resumeFrom?: string;
+    // Записувати всі переходи для офлайн-тренування (recordings/<id завдання>)
+    record?: boolean;
 }
 
 export interface EnvConfig {
@@ -57,6 +79,7 @@ export interface EnvConfig {
     nCoins: number;
     nObstacles: number;
     dynamicObstacles: boolean;
+    engine?: 'list' | 'bitboard';
     rewards: {
         coinCollected: number;
         collision: number;
@@ -74,11 +97,29 @@ export interface AgentConfig {
     epsilonDecay: number;
     epsilonMin: number;
     memorySize: number;
+    // Назва директорії replay-пам'яті на диску сервера (np.memmap), що переживає перезапуск
+    memoryDir?: string;
 }
 
 export interface TrainingConfig {
     episodes: number;
     renderEvery: number;
+    // Епізодів між чекпойнтами (за замовчуванням 50)
+    checkpointEvery?: number;
+    checkpointMemory?: boolean;
 }
 
-export type ConnectionStatus = 'connected' | 'disconnected' | 'error';
\ No newline at end of file
+export type ConnectionStatus = 'connected' | 'disconnected' | 'error';
+
+// GET /jobs/{id}/history/{series}?start=&end=&resolution=&maxPoints=
+export interface HistorySeries {
+    series: string;
+    start: number;
+    end: number;
+    resolution: 1 | 10 | 100;
+    episodes: number[];
+    count: number[];
+    min: number[];
+    mean: number[];
+    max: number[];
+}